@@ -5,120 +5,270 @@ Handles AI-powered user analysis using Google Gemini API.
 Includes intelligent chunking for large histories, rate limiting, and exponential backoff.
 """
 
-import asyncpraw as praw
 import asyncio
-from datetime import datetime, timezone, timedelta
-import google.generativeai as genai
+import functools
+import heapq
+import random
+import time
+from itertools import chain, islice
+from operator import attrgetter
+from typing import NamedTuple
 
+from config_manager import get_reddit_client, get_gemini_model
+from rate_limiter import AsyncRateLimiter, gather_fail_fast, get_reddit_limiter, rate_limited
 
-async def extract_user_history_for_ai(username, time_limit_days, config, msg_queue):
-    """Extracts user's posts and comments for AI analysis, filtered by time period."""
-    reddit = praw.Reddit(
-        client_id=config.get('client_id', ''),
-        client_secret=config.get('client_secret', ''),
-        user_agent=config.get('user_agent', 'RedditHistoryDownloader/2.0')
-    )
-    
+
+# Gemini free tier allows 15 requests per minute
+GEMINI_RPM = 15
+GEMINI_MAX_CONCURRENT = 3
+
+# Reddit never serves more than ~1000 items from a listing, so never ask for more
+REDDIT_LISTING_CAP = 1000
+
+# Minimum seconds between repeated progress messages during long fetches
+PROGRESS_INTERVAL = 0.5
+
+# Histories estimated under this many tokens go to Gemini in a single request
+SINGLE_REQUEST_TOKENS = 80000
+
+# Exact counts are only worth a round trip once the estimate is within this fraction of
+# SINGLE_REQUEST_TOKENS; smaller histories take the single-request path either way
+EXACT_COUNT_MARGIN = 0.5
+
+# Exact Gemini token counts keyed by corpus id (see run_ai_analysis_async), oldest evicted first
+TOKEN_CACHE_SIZE = 16
+_token_cache = {}
+
+# Fetched histories keyed by (username, days) -> (fetched_at, posts, comments), reused for CORPUS_TTL
+# seconds so a follow-up question skips the Reddit listing walks
+CORPUS_TTL = 600
+CORPUS_CACHE_SIZE = 8
+_corpus_cache = {}
+
+# Successful answers keyed by (corpus id, question), oldest evicted first. A corpus id is
+# (username, days, fetched_at) from _corpus_cache, so a refetched history never matches old answers
+RESPONSE_CACHE_SIZE = 32
+_response_cache = {}
+
+
+# Prompt templates, filled with str.format_map per request
+SINGLE_PROMPT = """Analyze this Reddit user's activity and answer the question below.
+
+DATA FORMAT (ultra-compact to save tokens):
+- First line: Posts:N Comments:M
+- P|subreddit|title|body = Post
+- C|subreddit|text = Comment
+- (xN) after text = posted N times
+
+QUESTION: {question}
+
+USER ACTIVITY:
+{history}
+
+Provide a detailed, insightful answer based on patterns and topics in their activity. Reference specific examples."""
+
+CHUNK_PROMPT = """Analyze this PARTIAL Reddit user activity (chunk {i}/{n}) and answer the question.
+
+QUESTION: {question}
+
+PARTIAL ACTIVITY:
+{history}
+
+Provide insights based on THIS chunk only. Keep response concise as it will be combined with other chunks."""
+
+SYNTHESIS_PROMPT = """You analyzed a Reddit user in {n} parts. Below are the partial analyses.
+
+ORIGINAL QUESTION: {question}
+
+PARTIAL ANALYSES:
+{answers}
+
+Synthesize these partial analyses into ONE comprehensive, coherent answer to the original question. Combine insights, identify patterns across all chunks, and provide a unified perspective."""
+
+
+class Post(NamedTuple):
+    """A user's post as kept for AI analysis, with text already truncated."""
+    subreddit: str
+    title: str
+    selftext: str
+    score: int
+    created_utc: float
+
+
+class Comment(NamedTuple):
+    """A user's comment as kept for AI analysis, with the body already truncated."""
+    subreddit: str
+    body: str
+    score: int
+    created_utc: float
+
+
+async def _fetch_posts(redditor, cutoff_timestamp, msg_queue):
+    """Fetches a user's posts newer than the cutoff timestamp, with text pre-truncated for the AI prompt."""
     posts_list = []
+    last_log = time.monotonic()
+    # Listings are newest-first: breaking at the cutoff stops PRAW before it requests the next page
+    async for post in rate_limited(redditor.submissions.new(limit=REDDIT_LISTING_CAP), get_reddit_limiter()):
+        if post.created_utc < cutoff_timestamp:
+            break
+        posts_list.append(Post(
+            subreddit=post.subreddit.display_name,
+            title=post.title[:80],
+            selftext=(post.selftext or '')[:150],
+            score=post.score,
+            created_utc=post.created_utc
+        ))
+        now = time.monotonic()
+        if now - last_log > PROGRESS_INTERVAL:
+            msg_queue.append(f"  -> Found {len(posts_list)} posts...")
+            last_log = now
+    
+    msg_queue.append(f"[SUCCESS] Extracted {len(posts_list)} posts")
+    return posts_list
+
+
+async def _fetch_comments(redditor, cutoff_timestamp, msg_queue):
+    """Fetches a user's comments newer than the cutoff timestamp, skipping removed ones and truncating bodies."""
     comments_list = []
+    last_log = time.monotonic()
+    async for comment in rate_limited(redditor.comments.new(limit=REDDIT_LISTING_CAP), get_reddit_limiter()):
+        if comment.created_utc < cutoff_timestamp:
+            break
+        if comment.author is None and comment.body == "[removed]":
+            continue
+        comments_list.append(Comment(
+            subreddit=comment.subreddit.display_name,
+            body=(comment.body or '')[:200],
+            score=comment.score,
+            created_utc=comment.created_utc
+        ))
+        now = time.monotonic()
+        if now - last_log > PROGRESS_INTERVAL:
+            msg_queue.append(f"  -> Found {len(comments_list)} comments...")
+            last_log = now
+    
+    msg_queue.append(f"[SUCCESS] Extracted {len(comments_list)} comments")
+    return comments_list
+
+
+async def extract_user_history_for_ai(username, time_limit_days, config, msg_queue, session=None):
+    """Extracts user's posts and comments for AI analysis, filtered by time period."""
+    reddit = get_reddit_client(config, session)
     
     try:
-        msg_queue.put(f"[INFO] Extracting history for u/{username}...")
+        msg_queue.append(f"[INFO] Extracting history for u/{username}...")
         redditor = await reddit.redditor(username)
         
         # Calculate cutoff time
         if time_limit_days > 0:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(days=time_limit_days)
-            cutoff_timestamp = cutoff_time.timestamp()
+            cutoff_timestamp = time.time() - time_limit_days * 86400
         else:
             cutoff_timestamp = 0  # Get all history
         
-        # Extract posts
-        msg_queue.put("[INFO] Fetching posts...")
-        post_count = 0
-        async for post in redditor.submissions.new(limit=None):
-            if post.created_utc < cutoff_timestamp:
-                break
-            posts_list.append({
-                'type': 'post',
-                'subreddit': post.subreddit.display_name,
-                'title': post.title,
-                'selftext': post.selftext,
-                'score': post.score,
-                'url': post.url,
-                'created_utc': post.created_utc,
-                'created_str': datetime.fromtimestamp(post.created_utc, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
-            })
-            post_count += 1
-            if post_count % 50 == 0:
-                msg_queue.put(f"  -> Found {post_count} posts...")
-        
-        msg_queue.put(f"[SUCCESS] Extracted {len(posts_list)} posts")
-        
-        # Extract comments
-        msg_queue.put("[INFO] Fetching comments...")
-        comment_count = 0
-        async for comment in redditor.comments.new(limit=None):
-            if comment.created_utc < cutoff_timestamp:
-                break
-            if comment.author is None and comment.body == "[removed]":
-                continue
-            comments_list.append({
-                'type': 'comment',
-                'subreddit': comment.subreddit.display_name,
-                'body': comment.body,
-                'score': comment.score,
-                'created_utc': comment.created_utc,
-                'created_str': datetime.fromtimestamp(comment.created_utc, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
-            })
-            comment_count += 1
-            if comment_count % 100 == 0:
-                msg_queue.put(f"  -> Found {comment_count} comments...")
+        # Posts and comments are independent listings, so fetch them concurrently; if one
+        # fails the other is cancelled rather than paging on and reporting success
+        msg_queue.append("[INFO] Fetching posts and comments...")
+        posts_list, comments_list = await gather_fail_fast(
+            _fetch_posts(redditor, cutoff_timestamp, msg_queue),
+            _fetch_comments(redditor, cutoff_timestamp, msg_queue)
+        )
         
-        msg_queue.put(f"[SUCCESS] Extracted {len(comments_list)} comments")
-        msg_queue.put(f"[SUMMARY] Total items: {len(posts_list) + len(comments_list)}")
+        msg_queue.append(f"[SUMMARY] Total items: {len(posts_list) + len(comments_list)}")
         
         return posts_list, comments_list
         
     except Exception as e:
         err_text = str(e)
         if "404" in err_text:
-            msg_queue.put(f"[ERROR] User '{username}' does not exist or has been deleted.")
+            msg_queue.append(f"[ERROR] User '{username}' does not exist or has been deleted.")
         elif "403" in err_text:
-            msg_queue.put(f"[ERROR] User '{username}' has been suspended from Reddit.")
+            msg_queue.append(f"[ERROR] User '{username}' has been suspended from Reddit.")
         else:
-            msg_queue.put(f"[ERROR] Could not extract user history: {e}")
+            msg_queue.append(f"[ERROR] Could not extract user history: {e}")
         return [], []
-    finally:
-        if reddit:
-            await reddit.close()
+
+
+@functools.lru_cache(maxsize=4096)
+def _item_text(kind, subreddit, text, body=""):
+    """Builds the compact single-line form of a post (P|...) or comment (C|...)."""
+    if kind == 'post':
+        # Format: P|subreddit|title|truncated_body
+        return f"P|r/{subreddit}|{text}|{body}"
+    # Format: C|subreddit|comment_text
+    return f"C|r/{subreddit}|{text}"
+
+
+def format_item(item):
+    """Returns the compact line for a history item, memoized on its content."""
+    if isinstance(item, Post):
+        return _item_text('post', item.subreddit, item.title, item.selftext)
+    return _item_text('comment', item.subreddit, item.body)
+
+
+def dedupe_items(items):
+    """Collapses repeated posts/comments (same subreddit and text) into the newest one.
+
+    The kept item's text is suffixed with "(xN)" so the repeat count survives.
+    Order is preserved.
+    """
+    first_index = {}
+    unique = []
+    counts = []
+    for item in items:
+        if isinstance(item, Post):
+            key = (item.subreddit, item.title, item.selftext)
+        else:
+            key = (item.subreddit, item.body)
+        index = first_index.get(key)
+        if index is None:
+            first_index[key] = len(unique)
+            unique.append(item)
+            counts.append(1)
+        else:
+            counts[index] += 1
+    
+    for index, count in enumerate(counts):
+        if count > 1:
+            item = unique[index]
+            if isinstance(item, Post):
+                unique[index] = item._replace(title=f"{item.title} (x{count})")
+            else:
+                unique[index] = item._replace(body=f"{item.body} (x{count})")
+    return unique
+
+
+def _history_header(post_count, item_count):
+    """Builds the ultra-compact header line that opens a formatted history."""
+    return f"Posts:{post_count} Comments:{item_count - post_count}\n"
+
+
+def _is_newest_first(items):
+    """Checks that items are ordered by descending created_utc."""
+    return all(a.created_utc >= b.created_utc for a, b in zip(items, items[1:]))
 
 
 def format_history_for_ai(posts, comments, max_items=500):
     """Formats user history into an ULTRA-COMPACT text for AI analysis to save tokens."""
-    all_items = posts + comments
-    all_items.sort(key=lambda x: x['created_utc'], reverse=True)
-    
-    if len(all_items) > max_items:
-        all_items = all_items[:max_items]
-    
-    # Ultra-compact header
-    post_count = len([i for i in all_items if i['type'] == 'post'])
-    comment_count = len(all_items) - post_count
-    
-    # Single line per item, minimal formatting
-    lines = [f"Posts:{post_count} Comments:{comment_count}\n"]
+    by_time = attrgetter('created_utc')
+    if _is_newest_first(posts) and _is_newest_first(comments):
+        # Both lists arrive newest-first from the listings, so a linear merge replaces a full sort
+        merged = heapq.merge(posts, comments, key=by_time, reverse=True)
+        all_items = list(islice(merged, max_items))
+    else:
+        # Unordered input: keep only the newest max_items, O(n log k) instead of a full sort
+        all_items = heapq.nlargest(max_items, chain(posts, comments), key=by_time)
     
+    # Single line per item, minimal formatting. Slot 0 holds the header, filled in
+    # once the post count is known so the items are only walked once.
+    lines = [None]
+    lines_append = lines.append
+    post_count = 0
     for item in all_items:
-        if item['type'] == 'post':
-            # Format: P|subreddit|title [truncated_body]
-            title = item['title'][:80]  # Limit title
-            body = item['selftext'][:150] if item['selftext'] else ""  # Limit body
-            lines.append(f"P|r/{item['subreddit']}|{title}|{body}")
-        else:
-            # Format: C|subreddit|comment_text
-            body = item['body'][:200]  # Limit comment length
-            lines.append(f"C|r/{item['subreddit']}|{body}")
+        if isinstance(item, Post):
+            post_count += 1
+        lines_append(format_item(item))
+    
+    lines[0] = _history_header(post_count, len(all_items))
     
     return '\n'.join(lines)
 
@@ -128,46 +278,109 @@ def estimate_tokens(text):
     return len(text) // 4
 
 
-def chunk_items(all_items, max_tokens_per_chunk=70000):
-    """Splits items into chunks that fit within token limits."""
-    chunks = []
+async def count_tokens_exact(model, texts, cache_key=None):
+    """Counts the tokens of the newline-joined texts with a single Gemini call.
+
+    If cache_key identifies the corpus the texts came from, the result is cached under it.
+    Returns None if counting fails, so callers can fall back to estimate_tokens.
+    """
+    key = cache_key
+    if key is None or key not in _token_cache:
+        try:
+            response = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: model.count_tokens('\n'.join(texts))
+            )
+        except Exception:
+            return None
+        if key is None:
+            return response.total_tokens
+        _cache_put(_token_cache, key, response.total_tokens, TOKEN_CACHE_SIZE)
+    return _token_cache[key]
+
+
+def build_chunks(all_items, max_tokens_per_chunk=70000, item_tokens_list=None):
+    """Splits items into token-bounded chunks, formatting each chunk's text in the same pass.
+
+    Yields (chunk_items, chunk_text) tuples, where chunk_text has the same layout as
+    format_history_for_ai. item_tokens_list may carry precomputed per-item token
+    counts (parallel to all_items).
+    """
+    if item_tokens_list is None:
+        item_tokens_list = [estimate_tokens(format_item(item)) for item in all_items]
+    
     current_chunk = []
+    lines = []
+    post_count = 0
     current_tokens = 0
     
     header_tokens = 50  # Reserve for header
     
-    for item in all_items:
-        # Estimate tokens for this item
-        if item['type'] == 'post':
-            title = item['title'][:80]
-            body = item['selftext'][:150] if item['selftext'] else ""
-            item_text = f"P|r/{item['subreddit']}|{title}|{body}"
-        else:
-            body = item['body'][:200]
-            item_text = f"C|r/{item['subreddit']}|{body}"
-        
-        item_tokens = estimate_tokens(item_text)
-        
-        # If adding this item would exceed limit, start new chunk
+    for item, item_tokens in zip(all_items, item_tokens_list):
+        # If adding this item would exceed limit, emit the chunk and start a new one
         if current_tokens + item_tokens > max_tokens_per_chunk and current_chunk:
-            chunks.append(current_chunk)
+            yield current_chunk, _history_header(post_count, len(current_chunk)) + '\n' + '\n'.join(lines)
             current_chunk = []
+            lines = []
+            post_count = 0
             current_tokens = header_tokens
         
         current_chunk.append(item)
+        lines.append(format_item(item))
+        if isinstance(item, Post):
+            post_count += 1
         current_tokens += item_tokens
     
-    # Add remaining items
+    # Emit remaining items
     if current_chunk:
-        chunks.append(current_chunk)
-    
-    return chunks
+        yield current_chunk, _history_header(post_count, len(current_chunk)) + '\n' + '\n'.join(lines)
+
+
+def _retry_delay_seconds(error):
+    """Returns the server-suggested retry delay from a Gemini quota error, if it carries one."""
+    candidates = [error] + list(getattr(error, 'details', None) or [])
+    for candidate in candidates:
+        delay = getattr(candidate, 'retry_delay', None)
+        if delay is None:
+            continue
+        if isinstance(delay, (int, float)):
+            return float(delay)
+        if hasattr(delay, 'total_seconds'):
+            return delay.total_seconds()
+        if hasattr(delay, 'seconds'):
+            # protobuf Duration
+            return delay.seconds + getattr(delay, 'nanos', 0) / 1e9
+    return None
 
 
-async def query_gemini_with_retry(model, prompt, msg_queue, max_retries=3):
-    """Queries Gemini with exponential backoff for rate limiting."""
+def _generate_streaming(model, prompt, on_chunk, streamed):
+    """Streams a Gemini response, passing each piece to on_chunk. Runs in a worker thread."""
+    for chunk in model.generate_content(prompt, stream=True):
+        streamed.append(chunk.text)
+        on_chunk(chunk.text)
+    return ''.join(streamed)
+
+
+async def query_gemini_with_retry(model, prompt, msg_queue, max_retries=3, limiter=None, max_backoff=30, on_chunk=None):
+    """Queries Gemini with exponential backoff for rate limiting.
+
+    If a limiter is given, every attempt (including retries) waits for a token first.
+    A server-provided retry delay is waited out in full; otherwise exponential backoff is capped at
+    max_backoff seconds. Both are jittered so concurrent chunks don't retry in lockstep.
+    If on_chunk is given, the response is streamed and on_chunk is called from a worker thread
+    with each piece of text; once any text has been streamed, errors are no longer retried.
+    """
+    streamed = []
     for attempt in range(max_retries):
+        if limiter is not None:
+            await limiter.acquire()
         try:
+            if on_chunk is not None:
+                text = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    lambda: _generate_streaming(model, prompt, on_chunk, streamed)
+                )
+                return True, text
             response = await asyncio.get_event_loop().run_in_executor(
                 None,
                 lambda: model.generate_content(prompt)
@@ -176,16 +389,20 @@ async def query_gemini_with_retry(model, prompt, msg_queue, max_retries=3):
         except Exception as e:
             error_str = str(e)
             
-            # Check if it's a rate limit error (429)
-            if '429' in error_str or 'quota' in error_str.lower():
+            # Check if it's a rate limit error (429); a retry after partial output would repeat it
+            if not streamed and ('429' in error_str or 'quota' in error_str.lower()):
                 if attempt < max_retries - 1:
-                    # Exponential backoff: 5s, 10s, 20s
-                    wait_time = 5 * (2 ** attempt)
-                    msg_queue.put(f"[WARNING] Rate limit hit. Waiting {wait_time}s before retry...")
+                    # Prefer the server's Retry-After hint, else exponential backoff: 5s, 10s, 20s...
+                    # The server's retry delay is honored as given; only the fallback is capped
+                    wait_time = _retry_delay_seconds(e)
+                    if wait_time is None:
+                        wait_time = min(max_backoff, 5 * (2 ** attempt))
+                    wait_time += random.uniform(0, 2)
+                    msg_queue.append(f"[WARNING] Rate limit hit. Waiting {wait_time:.1f}s before retry...")
                     await asyncio.sleep(wait_time)
                     continue
                 else:
-                    msg_queue.put(f"[ERROR] Rate limit persists after {max_retries} attempts")
+                    msg_queue.append(f"[ERROR] Rate limit persists after {max_retries} attempts")
                     return False, f"Rate limit error: {error_str}"
             else:
                 # Non-rate-limit error, don't retry
@@ -194,132 +411,165 @@ async def query_gemini_with_retry(model, prompt, msg_queue, max_retries=3):
     return False, "Max retries exceeded"
 
 
-async def analyze_with_chunking(api_key, user_question, all_items, msg_queue):
-    """Analyzes large history by chunking, with rate limiting and final synthesis."""
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('models/gemini-2.0-flash-001')
+async def analyze_with_chunking(api_key, user_question, posts, comments, msg_queue, on_chunk=None, corpus_id=None):
+    """Analyzes large history by chunking, with rate limiting and final synthesis.
+
+    posts and comments are expected newest-first, as returned by extract_user_history_for_ai.
+    If on_chunk is given, the final answer (not the per-chunk analyses) is streamed to it.
+    corpus_id, if given, keys the exact token count cache.
+    """
+    model = get_gemini_model(api_key)
     
-    # Estimate total tokens
-    total_text = '\n'.join([
-        f"P|{i['subreddit']}|{i.get('title', '')[:80]}|{i.get('selftext', '')[:150]}"
-        if i['type'] == 'post' else
-        f"C|{i['subreddit']}|{i['body'][:200]}"
-        for i in all_items
-    ])
-    total_tokens = estimate_tokens(total_text)
+    # Templated/bot-like repeats add tokens without adding signal
+    original_count = len(posts) + len(comments)
+    posts = dedupe_items(posts)
+    comments = dedupe_items(comments)
+    duplicates = original_count - len(posts) - len(comments)
+    if duplicates:
+        msg_queue.append(f"[INFO] Collapsed {duplicates} duplicate items")
     
-    msg_queue.put(f"[INFO] Total estimated tokens: ~{total_tokens:,}")
+    # Estimate total tokens in one pass without building the full history string.
+    # The same pass merges both streams newest-first, the order chunking needs.
+    all_items = []
+    item_texts = []
+    item_tokens_list = []
+    all_items_append = all_items.append
+    item_texts_append = item_texts.append
+    item_tokens_append = item_tokens_list.append
+    total_chars = 0
+    for item in heapq.merge(posts, comments, key=attrgetter('created_utc'), reverse=True):
+        all_items_append(item)
+        item_text = format_item(item)
+        item_texts_append(item_text)
+        item_tokens_append(estimate_tokens(item_text))
+        total_chars += len(item_text) + 1  # +1 for the joining newline
+    total_tokens = total_chars // 4
+    
+    # Near or past the single-request limit, one exact count for the whole history
+    # calibrates the per-item heuristic; well below it the estimate decides the same way
+    exact_tokens = None
+    if total_tokens >= SINGLE_REQUEST_TOKENS * (1 - EXACT_COUNT_MARGIN):
+        exact_tokens = await count_tokens_exact(model, item_texts, corpus_id)
+    if exact_tokens:
+        scale = exact_tokens / max(total_tokens, 1)
+        item_tokens_list = [int(tokens * scale) for tokens in item_tokens_list]
+        total_tokens = exact_tokens
+        msg_queue.append(f"[INFO] Total tokens: {total_tokens:,}")
+    else:
+        msg_queue.append(f"[INFO] Total estimated tokens: ~{total_tokens:,}")
     
     # If fits in single request, use normal path
-    if total_tokens < 80000:
-        msg_queue.put("[INFO] History fits in single request")
-        formatted_history = format_history_for_ai(
-            [i for i in all_items if i['type'] == 'post'],
-            [i for i in all_items if i['type'] == 'comment']
-        )
+    if total_tokens < SINGLE_REQUEST_TOKENS:
+        msg_queue.append("[INFO] History fits in single request")
+        formatted_history = format_history_for_ai(posts, comments)
         
-        prompt = f"""Analyze this Reddit user's activity and answer the question below.
-
-DATA FORMAT (ultra-compact to save tokens):
-- First line: Posts:N Comments:M
-- P|subreddit|title|body = Post
-- C|subreddit|text = Comment
-
-QUESTION: {user_question}
-
-USER ACTIVITY:
-{formatted_history}
-
-Provide a detailed, insightful answer based on patterns and topics in their activity. Reference specific examples."""
+        prompt = SINGLE_PROMPT.format_map({'question': user_question, 'history': formatted_history})
         
-        msg_queue.put("[INFO] Sending request to Gemini AI...")
-        return await query_gemini_with_retry(model, prompt, msg_queue)
+        msg_queue.append("[INFO] Sending request to Gemini AI...")
+        return await query_gemini_with_retry(model, prompt, msg_queue, on_chunk=on_chunk)
     
     # Multi-chunk analysis
-    chunks = chunk_items(all_items, max_tokens_per_chunk=70000)
-    msg_queue.put(f"[INFO] Splitting into {len(chunks)} chunks to stay within limits")
+    chunks = list(build_chunks(all_items, max_tokens_per_chunk=70000, item_tokens_list=item_tokens_list))
+    msg_queue.append(f"[INFO] Splitting into {len(chunks)} chunks to stay within limits")
     
-    partial_answers = []
+    # Chunks run concurrently; the limiter keeps request starts within the RPM quota
+    limiter = AsyncRateLimiter(GEMINI_RPM)
+    semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENT)
     
-    for i, chunk in enumerate(chunks, 1):
-        msg_queue.put(f"[INFO] Analyzing chunk {i}/{len(chunks)} ({len(chunk)} items)...")
-        
-        # Format this chunk
-        chunk_posts = [item for item in chunk if item['type'] == 'post']
-        chunk_comments = [item for item in chunk if item['type'] == 'comment']
-        chunk_formatted = format_history_for_ai(chunk_posts, chunk_comments, max_items=len(chunk))
-        
-        prompt = f"""Analyze this PARTIAL Reddit user activity (chunk {i}/{len(chunks)}) and answer the question.
-
-QUESTION: {user_question}
-
-PARTIAL ACTIVITY:
-{chunk_formatted}
-
-Provide insights based on THIS chunk only. Keep response concise as it will be combined with other chunks."""
-        
-        success, response = await query_gemini_with_retry(model, prompt, msg_queue)
-        
+    async def analyze_chunk(i, chunk, chunk_formatted):
+        async with semaphore:
+            msg_queue.append(f"[INFO] Analyzing chunk {i}/{len(chunks)} ({len(chunk)} items)...")
+            
+            prompt = CHUNK_PROMPT.format_map({
+                'question': user_question, 'history': chunk_formatted, 'i': i, 'n': len(chunks)
+            })
+            
+            return await query_gemini_with_retry(model, prompt, msg_queue, limiter=limiter)
+    
+    results = await asyncio.gather(
+        *(analyze_chunk(i, chunk, chunk_formatted) for i, (chunk, chunk_formatted) in enumerate(chunks, 1)),
+        return_exceptions=True
+    )
+    
+    partial_answers = []
+    for i, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            msg_queue.append(f"[WARNING] Chunk {i} failed: {result}")
+            continue
+        success, response = result
         if not success:
-            msg_queue.put(f"[WARNING] Chunk {i} failed: {response}")
+            msg_queue.append(f"[WARNING] Chunk {i} failed: {response}")
             continue
-        
         partial_answers.append(f"## Chunk {i}/{len(chunks)} Analysis:\n{response}")
-        
-        # Rate limiting: wait 5 seconds between chunks (free tier: 15 RPM = 4s minimum)
-        if i < len(chunks):
-            msg_queue.put(f"[INFO] Waiting 5s before next chunk (rate limiting)...")
-            await asyncio.sleep(5)
     
     if not partial_answers:
         return False, "All chunks failed to analyze"
     
     # Synthesize final answer
-    msg_queue.put(f"[INFO] Synthesizing {len(partial_answers)} partial answers into final response...")
+    msg_queue.append(f"[INFO] Synthesizing {len(partial_answers)} partial answers into final response...")
     
-    synthesis_prompt = f"""You analyzed a Reddit user in {len(chunks)} parts. Below are the partial analyses.
-
-ORIGINAL QUESTION: {user_question}
-
-PARTIAL ANALYSES:
-{'\\n\\n'.join(partial_answers)}
-
-Synthesize these partial analyses into ONE comprehensive, coherent answer to the original question. Combine insights, identify patterns across all chunks, and provide a unified perspective."""
+    synthesis_prompt = SYNTHESIS_PROMPT.format_map({
+        'question': user_question, 'answers': "\n\n".join(partial_answers), 'n': len(chunks)
+    })
     
-    # Final synthesis (after another delay)
-    await asyncio.sleep(5)
-    success, final_response = await query_gemini_with_retry(model, synthesis_prompt, msg_queue)
+    success, final_response = await query_gemini_with_retry(model, synthesis_prompt, msg_queue, limiter=limiter, on_chunk=on_chunk)
     
     if success:
-        msg_queue.put(f"[SUCCESS] Multi-chunk analysis complete!")
+        msg_queue.append(f"[SUCCESS] Multi-chunk analysis complete!")
     
     return success, final_response
 
 
-async def run_ai_analysis_async(username, time_limit_days, user_question, config, msg_queue):
-    """Main function to run AI analysis on a Reddit user."""
-    msg_queue.put(f"\n--- STARTING AI ANALYSIS FOR u/{username} ---")
+def _cache_put(cache, key, value, max_size):
+    """Inserts into an insertion-ordered dict cache, evicting the oldest entry past max_size."""
+    cache.pop(key, None)
+    cache[key] = value
+    if len(cache) > max_size:
+        del cache[next(iter(cache))]
+
+
+async def run_ai_analysis_async(username, time_limit_days, user_question, config, msg_queue, session=None, on_chunk=None):
+    """Main function to run AI analysis on a Reddit user.
+
+    If on_chunk is given, the answer is streamed to it as it is generated (see query_gemini_with_retry).
+    """
+    msg_queue.append(f"\n--- STARTING AI ANALYSIS FOR u/{username} ---")
     
     gemini_api_key = config.get('gemini_api_key', '').strip()
     if not gemini_api_key:
-        msg_queue.put("[ERROR] Gemini API key not configured. Please add it in the Settings tab.")
-        msg_queue.put("--- OPERATION COMPLETE ---")
+        msg_queue.append("[ERROR] Gemini API key not configured. Please add it in the Settings tab.")
+        msg_queue.append("--- OPERATION COMPLETE ---")
         return False, ""
     
-    posts, comments = await extract_user_history_for_ai(username, time_limit_days, config, msg_queue)
+    corpus_key = (username.lower(), time_limit_days)
+    cached = _corpus_cache.get(corpus_key)
+    if cached is not None and time.monotonic() - cached[0] < CORPUS_TTL:
+        fetched_at, posts, comments = cached
+        msg_queue.append(f"[INFO] Reusing u/{username}'s history fetched {int(time.monotonic() - fetched_at)}s ago.")
+    else:
+        posts, comments = await extract_user_history_for_ai(username, time_limit_days, config, msg_queue, session)
+        fetched_at = time.monotonic()
+        if posts or comments:
+            _cache_put(_corpus_cache, corpus_key, (fetched_at, posts, comments), CORPUS_CACHE_SIZE)
+    corpus_id = corpus_key + (fetched_at,)
     
     if not posts and not comments:
-        msg_queue.put("[ERROR] No history found for this user in the selected time period.")
-        msg_queue.put("--- OPERATION COMPLETE ---")
+        msg_queue.append("[ERROR] No history found for this user in the selected time period.")
+        msg_queue.append("--- OPERATION COMPLETE ---")
         return False, ""
     
-    msg_queue.put("[INFO] Preparing data for AI analysis...")
-    
-    # Combine posts and comments into unified list
-    all_items = posts + comments
+    response_key = (corpus_id, user_question)
+    if response_key in _response_cache:
+        msg_queue.append("[INFO] Same question on the same history; reusing the previous answer.")
+        msg_queue.append("--- OPERATION COMPLETE ---")
+        return True, _response_cache[response_key]
+
+    msg_queue.append("[INFO] Preparing data for AI analysis...")
     
     # Use new chunking system with automatic rate limiting
-    success, response = await analyze_with_chunking(gemini_api_key, user_question, all_items, msg_queue)
+    success, response = await analyze_with_chunking(gemini_api_key, user_question, posts, comments, msg_queue, on_chunk, corpus_id)
+    if success:
+        _cache_put(_response_cache, response_key, response, RESPONSE_CACHE_SIZE)
     
-    msg_queue.put("--- OPERATION COMPLETE ---")
+    msg_queue.append("--- OPERATION COMPLETE ---")
     return success, response
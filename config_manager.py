@@ -7,11 +7,31 @@ Credentials are stored in config.json file.
 
 import json
 import os
+import time
+import asyncio
+import functools
+import hashlib
 import asyncpraw as praw
 import google.generativeai as genai
 
+from rate_limiter import get_reddit_limiter
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; config.json is then read and written with the json module
+    orjson = None
+
 
 CONFIG_FILE = "config.json"
+GEMINI_MODEL = "models/gemini-2.0-flash-001"
+VALIDATION_TTL = 3600  # Seconds a successful Reddit validation is trusted for
+
+# Cached Reddit clients keyed on credentials; each entry remembers the loop it was built on
+# and whether the client owns its aiohttp session (False when the caller passed one in)
+_reddit_clients = {}
+
+# time.monotonic() of the last successful validation per client key, for this process
+_validated_at = {}
 
 
 def load_config():
@@ -19,52 +39,138 @@ def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                if orjson is not None:
+                    return orjson.loads(f.read())
                 return json.load(f)
         except Exception as e:
             print(f"Error loading config: {e}")
     return {}
 
 
-def save_config(client_id, client_secret, user_agent, gemini_api_key=""):
-    """Saves API credentials to config.json file."""
+def credentials_hash(client_id, client_secret, user_agent):
+    """Fingerprint of a Reddit credential set, stored instead of comparing raw secrets."""
+    return hashlib.sha256(f"{client_id}|{client_secret}|{user_agent}".encode('utf-8')).hexdigest()
+
+
+def recently_validated(config, client_id, client_secret, user_agent):
+    """True if these exact credentials passed validation within VALIDATION_TTL."""
+    if config.get("creds_hash") != credentials_hash(client_id, client_secret, user_agent):
+        return False
+    return time.time() - config.get("validated_at", 0) < VALIDATION_TTL
+
+
+def save_config(client_id, client_secret, user_agent, gemini_api_key="", validated=False):
+    """Saves API credentials to config.json file.
+
+    Pass validated=True right after a successful validation to record it for recently_validated().
+    """
     # Load existing config to preserve other fields
-    existing_config = load_config()
+    config = load_config()
     
-    config = {
+    config.update({
         "client_id": client_id,
         "client_secret": client_secret,
         "user_agent": user_agent,
-        "gemini_api_key": gemini_api_key if gemini_api_key else existing_config.get("gemini_api_key", "")
-    }
+        "gemini_api_key": gemini_api_key if gemini_api_key else config.get("gemini_api_key", "")
+    })
+    if validated:
+        config["creds_hash"] = credentials_hash(client_id, client_secret, user_agent)
+        config["validated_at"] = time.time()
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4)
+            if orjson is not None:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2).decode())
+            else:
+                json.dump(config, f, indent=2)
         return True
     except Exception as e:
         print(f"Error saving config: {e}")
         return False
 
 
-async def validate_credentials(client_id, client_secret, user_agent):
-    """Validates Reddit API credentials by attempting a connection."""
-    reddit = None
+def _client_key(config):
+    """Builds the cache key identifying a Reddit client's credentials."""
+    return (
+        config.get('client_id', ''),
+        config.get('client_secret', ''),
+        config.get('user_agent', 'RedditHistoryDownloader/2.0')
+    )
+
+
+def get_reddit_client(config, session=None):
+    """Returns a cached Reddit client for the given credentials, building it on first use.
+
+    Must be called from a running event loop. The client's aiohttp session is tied to
+    that loop, so a call from a different loop builds a fresh client. If an aiohttp
+    session is given, a newly built client sends its requests through it.
+    """
+    loop = asyncio.get_running_loop()
+    key = _client_key(config)
+    cached = _reddit_clients.get(key)
+    if cached is not None and cached[0] is loop:
+        return cached[1]
+
+    reddit = praw.Reddit(
+        client_id=key[0], client_secret=key[1], user_agent=key[2],
+        requestor_kwargs={'session': session} if session else None
+    )
+    _reddit_clients[key] = (loop, reddit, session is None)
+    return reddit
+
+
+async def close_reddit_clients():
+    """Closes every cached Reddit client that belongs to the running event loop.
+
+    Clients built on a caller's session are only dropped; that session is the caller's to close.
+    """
+    loop = asyncio.get_running_loop()
+    for key, (client_loop, reddit, owns_session) in list(_reddit_clients.items()):
+        if client_loop is loop:
+            del _reddit_clients[key]
+            if owns_session: await reddit.close()
+
+
+async def validate_credentials(client_id, client_secret, user_agent, session=None):
+    """Validates Reddit API credentials by attempting a connection.
+
+    The validated client stays cached (see get_reddit_client), so later requests with the
+    same credentials reuse its token; repeat validations within VALIDATION_TTL skip the network.
+    """
+    config = {"client_id": client_id, "client_secret": client_secret, "user_agent": user_agent}
+    key = _client_key(config)
+    validated_at = _validated_at.get(key)
+    if validated_at is not None and time.monotonic() - validated_at < VALIDATION_TTL:
+        return True, "Credentials are valid!"
     try:
-        reddit = praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent)
+        reddit = get_reddit_client(config, session)
+        await get_reddit_limiter().acquire()
         await reddit.user.me()
+        _validated_at[key] = time.monotonic()
         return True, "Credentials are valid!"
     except Exception as e:
+        # Don't keep a client around for credentials that just failed. A shared session belongs
+        # to the caller; closing the client would close it too
+        cached = _reddit_clients.pop(key, None)
+        if cached is not None and cached[2]:
+            await cached[1].close()
         return False, f"Invalid credentials: {str(e)}"
-    finally:
-        if reddit:
-            await reddit.close()
 
 
-def validate_gemini_api_key(api_key):
-    """Validates Gemini API key by attempting a simple request."""
+@functools.lru_cache(maxsize=4)
+def get_gemini_model(api_key, model_name=GEMINI_MODEL):
+    """Returns a cached Gemini model handle, configuring the SDK for the key on first use."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+async def validate_gemini_api_key(api_key):
+    """Validates Gemini API key by attempting a simple request off the event loop thread."""
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("test")
+        model = get_gemini_model(api_key)
+        await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: model.generate_content("test")
+        )
         return True, "Gemini API key is valid!"
     except Exception as e:
         return False, f"Invalid Gemini API key: {str(e)}"
@@ -7,15 +7,48 @@ Imports functionality from separate modules and provides the GUI.
 
 import customtkinter as ctk
 import threading
-import queue
+import collections
 import asyncio
+import concurrent.futures
+import functools
 import webbrowser
+from types import MappingProxyType
+import aiohttp
 
 # Local imports
-from config_manager import load_config, save_config, validate_credentials
-from reddit_extractor import run_user_downloader_async, run_subreddit_downloader_async  
+from config_manager import load_config, save_config, validate_credentials, recently_validated, close_reddit_clients
+from reddit_extractor import FilterSpec, run_user_downloader_async, run_subreddit_downloader_async
 from ai_analyzer import run_ai_analysis_async
 
+REDDIT_PREFS_URL = "https://www.reddit.com/prefs/apps"
+_OPEN_REDDIT_PREFS = functools.partial(webbrowser.open, REDDIT_PREFS_URL)
+
+# AI analysis time periods in days; the selector lists them in this order
+_TIME_PERIOD_MAP = MappingProxyType({
+    'Last 7 days': 7,
+    'Last 30 days': 30,
+    'Last 3 months': 90,
+    'Last 6 months': 180,
+    'Last 1 year': 365,
+    'All time': 36500
+})
+_TIME_PERIODS = tuple(_TIME_PERIOD_MAP)
+
+
+class LogPipe(collections.deque):
+    """Log pipe deque that calls wake() on the first message appended after each drain."""
+
+    def __init__(self, wake, maxlen=None):
+        super().__init__(maxlen=maxlen)
+        self._wake = wake
+        self.wake_pending = False
+
+    def append(self, message):
+        super().append(message)
+        if not self.wake_pending:
+            self.wake_pending = True
+            self._wake()
+
 
 # --- GUI CLASS ---
 
@@ -34,24 +67,60 @@ class downloaderApp:
     THEME_ERROR = "#EF4444"         # Vibrant Red
     THEME_BORDER = "#E6E6E8"        # Light Gray Border
 
+    LOG_MAX_LINES = 2000            # Older log lines are trimmed beyond this
+    LOG_TRIM_EVERY = 200            # Lines inserted between line-count checks
+    QUEUE_POLL_MS = 500             # Fallback log pipe poll; producers normally wake the Tk loop
+
+    # Shared widget kwargs, unpacked at every call site
+    _ENTRY_KW = {"fg_color": THEME_INPUT_BG, "border_width": 1, "border_color": THEME_BORDER,
+                 "corner_radius": 10, "text_color": THEME_TEXT}
+    _PRIMARY_BUTTON_KW = {"height": 45, "corner_radius": 22,
+                          "fg_color": THEME_ACCENT, "hover_color": THEME_ACCENT_HOVER}
+    _CARD_FRAME_KW = {"fg_color": THEME_CARD_BG, "corner_radius": 15,
+                      "border_width": 2, "border_color": THEME_BORDER}
+    _TEXTBOX_KW = {"fg_color": THEME_INPUT_BG, "border_width": 1, "border_color": THEME_BORDER,
+                   "corner_radius": 10}
+
     def __init__(self, root):
         self.root = root
         self.root.title("KarmaScanner v1.0")
         self.root.geometry("1100x1000")
-        self.msg_queue = queue.Queue()
+        # Log pipe from worker threads to the Tk loop; deque append/popleft are atomic, no lock needed
+        self.msg_queue = LogPipe(self._wake_log, maxlen=10000)
+        self._log_counter = 0
         self.config = load_config()
         self.credentials_valid = False
+        # State for widgets on tabs that may not be built yet; builders apply it on creation
+        self._status = ("Not Configured", self.THEME_ERROR)
+        self._download_state = 'normal'
+
+        # --- Background event loop + shared HTTP session for all network work ---
+        self._loop = asyncio.new_event_loop()
+        # Bounded pool for blocking SDK calls (run_in_executor(None, ...)) made from the loop
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='ks-worker')
+        self._loop.set_default_executor(self._executor)
+        self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._loop_thread.start()
+        self._http_session = asyncio.run_coroutine_threadsafe(self._create_http_session(), self._loop).result()
+        self.root.protocol("WM_DELETE_WINDOW", self._shutdown)
 
         # --- Appearance ---
         ctk.set_appearance_mode("Light")
         self.root.configure(fg_color=self.THEME_BG)
 
+        # --- Shared Fonts (one Tk font object each, reused by every widget) ---
+        self.F_TITLE = ctk.CTkFont(family="Helvetica Neue", size=20, weight="bold")
+        self.F_HEADER = ctk.CTkFont(family="Helvetica Neue", size=18, weight="bold")
+        self.F_SECTION = ctk.CTkFont(family="Helvetica Neue", size=16, weight="bold")
+        self.F_LABEL_BOLD = ctk.CTkFont(family="Helvetica Neue", weight="bold")
+        self.F_SUBTITLE = ctk.CTkFont(family="Helvetica Neue", size=13)
+        self.F_BODY = ctk.CTkFont(family="Helvetica Neue", size=12)
+
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_rowconfigure(0, weight=1)
 
         # --- Global Scrollable Frame ---
         self.main_scroll_frame = ctk.CTkScrollableFrame(self.root, fg_color="transparent")
-        self.main_scroll_frame.grid(row=0, column=0, sticky="nsew")
         self.main_scroll_frame.grid_columnconfigure(0, weight=1)
 
         # --- Tabs ---
@@ -63,7 +132,7 @@ class downloaderApp:
             segmented_button_unselected_hover_color=self.THEME_BORDER,
             text_color=self.THEME_TEXT, 
             corner_radius=20,
-            command=self.update_tab_colors)
+            command=self._schedule_update_tab_colors)
         self.tab_view.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
         
         self.tab_view.add("Settings")
@@ -79,17 +148,28 @@ class downloaderApp:
         for tab in [self.settings_tab, self.user_tab, self.subreddit_tab, self.enhanced_search_tab]:
             tab.configure(fg_color=self.THEME_BG)
 
+        # Access internal segmented button's buttons to set individual text colors
+        # This is a workaround as CTk doesn't support state-based text colors directly
+        segmented_button = getattr(self.tab_view, "_segmented_button", None)
+        self._tab_buttons = getattr(segmented_button, "_buttons_dict", None)
+
+        # Only the default tab is built now; the others are built on first selection
+        self._tab_builders = {
+            "Settings": self.create_settings_widgets,
+            "Subreddit History": self.create_subreddit_widgets,
+            "Enhanced User Search": self.create_enhanced_search_widgets,
+        }
+        self._built = {"User History"}
+        self._last_tab = None
+        self._tab_color_pending = False
+        self.create_user_widgets()
+
         # Set default tab
         self.tab_view.set("User History")
 
         # Initial color update for tabs
         self.update_tab_colors()
 
-        self.create_settings_widgets()
-        self.create_user_widgets()
-        self.create_subreddit_widgets()
-        self.create_enhanced_search_widgets()
-
         # --- Log Area ---
         self.log_area = ctk.CTkTextbox(self.main_scroll_frame, 
             state='disabled', 
@@ -104,51 +184,90 @@ class downloaderApp:
         # Increased padx to 40 to align with inner content cards (20 tab + 20 card)
         self.log_area.grid(row=1, column=0, padx=40, pady=(0, 20), sticky="nsew")
 
+        # Map the scroll frame only once its contents exist, so startup does a single layout pass
+        self.main_scroll_frame.grid(row=0, column=0, sticky="nsew")
+
+        self.root.bind("<<LogPending>>", self._drain_queue)
         self.process_queue()
         
         # Check if credentials are configured on startup
         self.check_initial_credentials()
 
+    def _run_loop(self):
+        """Runs the shared event loop forever; every coroutine is scheduled onto it."""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _create_http_session(self):
+        """Creates the aiohttp session shared by every Reddit request (must run on self._loop)."""
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=16, keepalive_timeout=75, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector)
+
+    def _shutdown(self):
+        """Closes network sessions and stops the background loop, then destroys the window."""
+        async def close_all():
+            await close_reddit_clients()
+            await self._http_session.close()
+
+        # Stop cross-thread wakes while the Tk thread blocks on the loop below
+        self.msg_queue.wake_pending = True
+        try:
+            asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing network sessions: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False)
+        self.root.destroy()
+
+    def _schedule_update_tab_colors(self):
+        """Coalesces rapid tab clicks into one recolor per idle tick."""
+        if not self._tab_color_pending:
+            self._tab_color_pending = True
+            self.root.after_idle(self._do_update_tab_colors)
+
+    def _do_update_tab_colors(self):
+        self._tab_color_pending = False
+        self.update_tab_colors()
+
     def update_tab_colors(self):
         """Updates the text color of tabs based on selection state."""
         selected_tab = self.tab_view.get()
-        try:
-            # Access internal segmented button's buttons to set individual text colors
-            # This is a workaround as CTk doesn't support state-based text colors directly
-            buttons = self.tab_view._segmented_button._buttons_dict
-            for name, button in buttons.items():
-                if name == selected_tab:
-                    button.configure(text_color="#FFFFFF")
-                else:
-                    button.configure(text_color=self.THEME_TEXT)
-        except Exception as e:
-            print(f"Error updating tab colors: {e}")
+        if selected_tab not in self._built:
+            self._built.add(selected_tab)
+            self._tab_builders[selected_tab]()
+        if selected_tab == self._last_tab:
+            return
+        if self._tab_buttons is None:
+            return
+        # Unselected buttons already use THEME_TEXT, so only the two that changed are touched
+        if self._last_tab is not None:
+            self._tab_buttons[self._last_tab].configure(text_color=self.THEME_TEXT)
+        self._tab_buttons[selected_tab].configure(text_color="#FFFFFF")
+        self._last_tab = selected_tab
 
 
 
     def create_settings_widgets(self):
         """Creates the Settings tab for API credentials configuration."""
+        # Colors used by most widgets below, bound once as locals
+        text_color, secondary_color = self.THEME_TEXT, self.THEME_TEXT_SECONDARY
         self.settings_tab.grid_columnconfigure(0, weight=1)
         
         # --- Header Card ---
-        header_frame = ctk.CTkFrame(self.settings_tab, fg_color=self.THEME_CARD_BG, corner_radius=15, 
-                                   border_width=2, border_color=self.THEME_BORDER)
-        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        header_frame = ctk.CTkFrame(self.settings_tab, **self._CARD_FRAME_KW)
         header_frame.grid_columnconfigure(0, weight=1)
         
         ctk.CTkLabel(header_frame, text="API Configuration", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=18, weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+                    font=self.F_HEADER,
+                    text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
         
         ctk.CTkLabel(header_frame, 
                     text="Configure your Reddit API credentials to use the downloader.", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=13),
-                    text_color=self.THEME_TEXT_SECONDARY).grid(row=1, column=0, padx=20, pady=(0, 20), sticky="w")
+                    font=self.F_SUBTITLE,
+                    text_color=secondary_color).grid(row=1, column=0, padx=20, pady=(0, 20), sticky="w")
         
         # --- Status Indicator ---
-        status_frame = ctk.CTkFrame(self.settings_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                   border_width=2, border_color=self.THEME_BORDER)
-        status_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
+        status_frame = ctk.CTkFrame(self.settings_tab, **self._CARD_FRAME_KW)
         status_frame.grid_columnconfigure(1, weight=1)
         
         # Container for precise alignment
@@ -156,66 +275,61 @@ class downloaderApp:
         status_container.grid(row=0, column=0, padx=20, pady=20, sticky="w")
         
         ctk.CTkLabel(status_container, text="Status:", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, padx=(0, 10), pady=0)
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=0, column=0, padx=(0, 10), pady=0)
         
-        self.status_label = ctk.CTkLabel(status_container, text="Not Configured", 
-                                        font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                                        text_color=self.THEME_ERROR)
+        status_text, status_color = self._status
+        self.status_label = ctk.CTkLabel(status_container, text=status_text, 
+                                        font=self.F_LABEL_BOLD,
+                                        text_color=status_color)
         self.status_label.grid(row=0, column=1, padx=0, pady=0)
         
         # --- API Credentials Form ---
-        form_frame = ctk.CTkFrame(self.settings_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                 border_width=2, border_color=self.THEME_BORDER)
-        form_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=0)
+        form_frame = ctk.CTkFrame(self.settings_tab, **self._CARD_FRAME_KW)
         form_frame.grid_columnconfigure(1, weight=1)
         
         # Client ID
-        ctk.CTkLabel(form_frame, text="Client ID", text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
-        self.client_id_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Client ID", 
-                                           fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER, 
-                                           corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(form_frame, text="Client ID", text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+        self.client_id_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Client ID", height=40, **self._ENTRY_KW)
         self.client_id_entry.grid(row=0, column=1, padx=20, pady=(20, 5), sticky="ew")
         
         # Client Secret
-        ctk.CTkLabel(form_frame, text="Client Secret", text_color=self.THEME_TEXT).grid(row=1, column=0, padx=20, pady=5, sticky="w")
-        self.client_secret_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Client Secret", 
-                                               show="*", fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                               corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(form_frame, text="Client Secret", text_color=text_color).grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.client_secret_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Client Secret", show="*", height=40, **self._ENTRY_KW)
         self.client_secret_entry.grid(row=1, column=1, padx=20, pady=5, sticky="ew")
         
         # User Agent
-        ctk.CTkLabel(form_frame, text="User Agent", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=5, sticky="w")
-        self.user_agent_entry = ctk.CTkEntry(form_frame, placeholder_text="RedditHistoryDownloader/2.0", 
-                                             fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                             corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(form_frame, text="User Agent", text_color=text_color).grid(row=2, column=0, padx=20, pady=5, sticky="w")
+        self.user_agent_entry = ctk.CTkEntry(form_frame, placeholder_text="RedditHistoryDownloader/2.0", height=40, **self._ENTRY_KW)
         self.user_agent_entry.grid(row=2, column=1, padx=20, pady=5, sticky="ew")
-        self.user_agent_entry.insert(0, "RedditHistoryDownloader/2.0")
+        self.user_agent_entry.insert(0, self.config.get('user_agent', 'RedditHistoryDownloader/2.0'))
         
         # Gemini API Key
-        ctk.CTkLabel(form_frame, text="Gemini API Key", text_color=self.THEME_TEXT).grid(row=3, column=0, padx=20, pady=5, sticky="w")
-        self.gemini_api_key_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Gemini API Key (optional)", 
-                                                 show="*", fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                 corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(form_frame, text="Gemini API Key", text_color=text_color).grid(row=3, column=0, padx=20, pady=5, sticky="w")
+        self.gemini_api_key_entry = ctk.CTkEntry(form_frame, placeholder_text="Enter your Gemini API Key (optional)", show="*", height=40, **self._ENTRY_KW)
         self.gemini_api_key_entry.grid(row=3, column=1, padx=20, pady=5, sticky="ew")
+
+        # Populate the form from the saved config
+        for entry, key in ((self.client_id_entry, 'client_id'),
+                           (self.client_secret_entry, 'client_secret'),
+                           (self.gemini_api_key_entry, 'gemini_api_key')):
+            value = self.config.get(key, '')
+            if value:
+                entry.insert(0, value)
         
         # --- Save Button ---
-        self.save_button = ctk.CTkButton(form_frame, text="Save & Validate Credentials", 
-                                        command=self.save_and_validate_credentials, 
-                                        height=45, corner_radius=22,
-                                        fg_color=self.THEME_ACCENT, hover_color=self.THEME_ACCENT_HOVER,
-                                        font=ctk.CTkFont(family="Helvetica Neue", weight="bold"))
+        self.save_button = ctk.CTkButton(form_frame, text="Save & Validate Credentials",
+                                        command=self.save_and_validate_credentials, **self._PRIMARY_BUTTON_KW,
+                                        font=self.F_LABEL_BOLD)
         self.save_button.grid(row=4, column=0, columnspan=2, padx=20, pady=25, sticky="ew")
         
         # --- Instructions ---
-        instructions_frame = ctk.CTkFrame(self.settings_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                         border_width=2, border_color=self.THEME_BORDER)
-        instructions_frame.grid(row=3, column=0, sticky="ew", padx=20, pady=(20, 10))
+        instructions_frame = ctk.CTkFrame(self.settings_tab, **self._CARD_FRAME_KW)
         instructions_frame.grid_columnconfigure(0, weight=1)
         
         ctk.CTkLabel(instructions_frame, text="How to get Reddit API credentials", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
         
         instructions_text = """1. Click the button below to open Reddit's app preferences page
 2. Scroll down and click "create another app..." or "create an app..."
@@ -228,75 +342,68 @@ class downloaderApp:
 6. Paste them above and click "Save & Validate Credentials"
 """
         ctk.CTkLabel(instructions_frame, text=instructions_text, 
-                    text_color=self.THEME_TEXT_SECONDARY, justify="left",
-                    font=ctk.CTkFont(family="Helvetica Neue", size=12)).grid(row=1, column=0, padx=20, pady=(0, 5), sticky="w")
+                    text_color=secondary_color, justify="left",
+                    font=self.F_BODY).grid(row=1, column=0, padx=20, pady=(0, 5), sticky="w")
         
         ctk.CTkButton(instructions_frame, text="Open Reddit App Preferences", 
-                     command=lambda: webbrowser.open("https://www.reddit.com/prefs/apps"),
+                     command=_OPEN_REDDIT_PREFS,
                      fg_color=self.THEME_INPUT_BG, border_color=self.THEME_ACCENT, 
                      border_width=1, hover_color=self.THEME_BG, text_color=self.THEME_ACCENT,
                      height=40, corner_radius=20).grid(row=2, column=0, padx=20, pady=(5, 20), sticky="ew")
 
+        # Attach the cards last so the tab is laid out once
+        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        status_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
+        form_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=0)
+        instructions_frame.grid(row=3, column=0, sticky="ew", padx=20, pady=(20, 10))
+
     def create_user_widgets(self):
+        text_color, secondary_color = self.THEME_TEXT, self.THEME_TEXT_SECONDARY
         self.user_tab.grid_columnconfigure(0, weight=1)
 
         # --- User Input Card ---
-        user_frame = ctk.CTkFrame(self.user_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                 border_width=2, border_color=self.THEME_BORDER)
-        user_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        user_frame = ctk.CTkFrame(self.user_tab, **self._CARD_FRAME_KW)
         user_frame.grid_columnconfigure(1, weight=1)
         
         ctk.CTkLabel(user_frame, text="Target User", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=16, weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 5), sticky="w")
+                    font=self.F_SECTION,
+                    text_color=text_color).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 5), sticky="w")
         
         ctk.CTkLabel(user_frame, text="User history must be public.", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=12),
-                    text_color=self.THEME_TEXT_SECONDARY).grid(row=1, column=0, columnspan=2, padx=20, pady=(0, 15), sticky="w")
+                    font=self.F_BODY,
+                    text_color=secondary_color).grid(row=1, column=0, columnspan=2, padx=20, pady=(0, 15), sticky="w")
         
-        ctk.CTkLabel(user_frame, text="Username", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=(5, 20), sticky="w")
-        self.user_entry = ctk.CTkEntry(user_frame, placeholder_text="e.g. spez", 
-                                      fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                      corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(user_frame, text="Username", text_color=text_color).grid(row=2, column=0, padx=20, pady=(5, 20), sticky="w")
+        self.user_entry = ctk.CTkEntry(user_frame, placeholder_text="e.g. spez", height=40, **self._ENTRY_KW)
         self.user_entry.grid(row=2, column=1, padx=20, pady=(5, 20), sticky="ew")
 
         # --- Filters Card ---
-        filters_frame = ctk.CTkFrame(self.user_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                    border_width=2, border_color=self.THEME_BORDER)
-        filters_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=0)
+        filters_frame = ctk.CTkFrame(self.user_tab, **self._CARD_FRAME_KW)
         filters_frame.grid_columnconfigure(1, weight=1)
         filters_frame.grid_columnconfigure(3, weight=1)
 
         # Post Filters Header
         ctk.CTkLabel(filters_frame, text="Post Filters", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, columnspan=4, padx=20, pady=(20, 10), sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=0, column=0, columnspan=4, padx=20, pady=(20, 10), sticky="w")
         
         # Post Limits
-        ctk.CTkLabel(filters_frame, text="Max posts", text_color=self.THEME_TEXT).grid(row=1, column=0, padx=20, pady=5, sticky="w")
-        self.user_posts_limit_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                  fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                  corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max posts", text_color=text_color).grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.user_posts_limit_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_posts_limit_entry.grid(row=1, column=1, padx=20, pady=5, sticky="w")
 
         # Post Scores
-        ctk.CTkLabel(filters_frame, text="Min score", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=5, sticky="w")
-        self.user_post_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                       fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                       corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Min score", text_color=text_color).grid(row=2, column=0, padx=20, pady=5, sticky="w")
+        self.user_post_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_post_score_lower_entry.grid(row=2, column=1, padx=20, pady=5, sticky="w")
         
-        ctk.CTkLabel(filters_frame, text="Max score", text_color=self.THEME_TEXT).grid(row=2, column=2, padx=20, pady=5, sticky="w")
-        self.user_post_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                       fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                       corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max score", text_color=text_color).grid(row=2, column=2, padx=20, pady=5, sticky="w")
+        self.user_post_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_post_score_upper_entry.grid(row=2, column=3, padx=20, pady=5, sticky="w")
 
         # Post Text
-        ctk.CTkLabel(filters_frame, text="Contains text", text_color=self.THEME_TEXT).grid(row=3, column=0, padx=20, pady=5, sticky="w")
-        self.user_post_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by title/body", 
-                                                       fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                       corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Contains text", text_color=text_color).grid(row=3, column=0, padx=20, pady=5, sticky="w")
+        self.user_post_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by title/body", **self._ENTRY_KW)
         self.user_post_text_filter_entry.grid(row=3, column=1, columnspan=3, padx=20, pady=5, sticky="ew")
 
         # Separator
@@ -304,110 +411,91 @@ class downloaderApp:
 
         # Comment Filters Header
         ctk.CTkLabel(filters_frame, text="Comment Filters", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=5, column=0, columnspan=4, padx=20, pady=5, sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=5, column=0, columnspan=4, padx=20, pady=5, sticky="w")
 
         # Comment Limits
-        ctk.CTkLabel(filters_frame, text="Max comments", text_color=self.THEME_TEXT).grid(row=6, column=0, padx=20, pady=5, sticky="w")
-        self.user_comments_limit_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                     fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                     corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max comments", text_color=text_color).grid(row=6, column=0, padx=20, pady=5, sticky="w")
+        self.user_comments_limit_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_comments_limit_entry.grid(row=6, column=1, padx=20, pady=5, sticky="w")
 
         # Comment Scores
-        ctk.CTkLabel(filters_frame, text="Min score", text_color=self.THEME_TEXT).grid(row=7, column=0, padx=20, pady=5, sticky="w")
-        self.user_comment_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                          fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                          corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Min score", text_color=text_color).grid(row=7, column=0, padx=20, pady=5, sticky="w")
+        self.user_comment_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_comment_score_lower_entry.grid(row=7, column=1, padx=20, pady=5, sticky="w")
         
-        ctk.CTkLabel(filters_frame, text="Max score", text_color=self.THEME_TEXT).grid(row=7, column=2, padx=20, pady=5, sticky="w")
-        self.user_comment_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                          fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                          corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max score", text_color=text_color).grid(row=7, column=2, padx=20, pady=5, sticky="w")
+        self.user_comment_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.user_comment_score_upper_entry.grid(row=7, column=3, padx=20, pady=5, sticky="w")
 
         # Comment Text
-        ctk.CTkLabel(filters_frame, text="Contains text", text_color=self.THEME_TEXT).grid(row=8, column=0, padx=20, pady=(5, 20), sticky="w")
-        self.user_comment_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by comment body", 
-                                                          fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                          corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Contains text", text_color=text_color).grid(row=8, column=0, padx=20, pady=(5, 20), sticky="w")
+        self.user_comment_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by comment body", **self._ENTRY_KW)
         self.user_comment_text_filter_entry.grid(row=8, column=1, columnspan=3, padx=20, pady=(5, 20), sticky="ew")
 
         # --- Start Button ---
-        self.start_user_button = ctk.CTkButton(self.user_tab, text="Start User History Download", 
-                                              command=self.start_user_download, 
-                                              height=45, corner_radius=22,
-                                              fg_color=self.THEME_ACCENT, hover_color=self.THEME_ACCENT_HOVER,
-                                              font=ctk.CTkFont(family="Helvetica Neue", weight="bold"))
+        self.start_user_button = ctk.CTkButton(self.user_tab, text="Start User History Download",
+                                              command=self.start_user_download, **self._PRIMARY_BUTTON_KW,
+                                              font=self.F_LABEL_BOLD)
         self.start_user_button.grid(row=2, column=0, padx=20, pady=(20, 0), sticky="ew")
 
+        # Attach the cards last so the tab is laid out once
+        user_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        filters_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=0)
+
     def create_subreddit_widgets(self):
+        text_color = self.THEME_TEXT
         self.subreddit_tab.grid_columnconfigure(0, weight=1)
 
         # --- Subreddit Input Card ---
-        sub_frame = ctk.CTkFrame(self.subreddit_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                border_width=2, border_color=self.THEME_BORDER)
-        sub_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        sub_frame = ctk.CTkFrame(self.subreddit_tab, **self._CARD_FRAME_KW)
         sub_frame.grid_columnconfigure(1, weight=1)
         
         ctk.CTkLabel(sub_frame, text="Target Subreddit", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=16, weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 15), sticky="w")
+                    font=self.F_SECTION,
+                    text_color=text_color).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 15), sticky="w")
         
-        ctk.CTkLabel(sub_frame, text="Subreddit Name", text_color=self.THEME_TEXT).grid(row=1, column=0, padx=20, pady=5, sticky="w")
-        self.subreddit_entry = ctk.CTkEntry(sub_frame, placeholder_text="e.g. Python", 
-                                           fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                           corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(sub_frame, text="Subreddit Name", text_color=text_color).grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.subreddit_entry = ctk.CTkEntry(sub_frame, placeholder_text="e.g. Python", height=40, **self._ENTRY_KW)
         self.subreddit_entry.grid(row=1, column=1, sticky="ew", padx=20, pady=5)
 
-        ctk.CTkLabel(sub_frame, text="Sort Method", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=(5, 20), sticky="w")
+        ctk.CTkLabel(sub_frame, text="Sort Method", text_color=text_color).grid(row=2, column=0, padx=20, pady=(5, 20), sticky="w")
         self.sort_method = ctk.CTkComboBox(sub_frame, values=['Top', 'Hot', 'New', 'All'], 
                                           fg_color=self.THEME_ACCENT, border_width=0,
                                           corner_radius=10, height=40,
                                           button_color=self.THEME_ACCENT, button_hover_color=self.THEME_ACCENT_HOVER,
                                           text_color="#FFFFFF", dropdown_fg_color=self.THEME_ELEVATED_BG,
-                                          dropdown_text_color=self.THEME_TEXT, state="readonly")
+                                          dropdown_text_color=text_color, state="readonly")
         self.sort_method.set('New')
         self.sort_method.grid(row=2, column=1, sticky="ew", padx=20, pady=(5, 20))
 
         # --- Filters Card ---
-        filters_frame = ctk.CTkFrame(self.subreddit_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                    border_width=2, border_color=self.THEME_BORDER)
-        filters_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=0)
+        filters_frame = ctk.CTkFrame(self.subreddit_tab, **self._CARD_FRAME_KW)
         filters_frame.grid_columnconfigure(1, weight=1)
         filters_frame.grid_columnconfigure(3, weight=1)
 
         # Post Filters Header
         ctk.CTkLabel(filters_frame, text="Post Filters", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, columnspan=4, padx=20, pady=(20, 10), sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=0, column=0, columnspan=4, padx=20, pady=(20, 10), sticky="w")
         
         # Post Limits
-        ctk.CTkLabel(filters_frame, text="Max posts", text_color=self.THEME_TEXT).grid(row=1, column=0, padx=20, pady=5, sticky="w")
-        self.subreddit_post_limit_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                      fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                      corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max posts", text_color=text_color).grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.subreddit_post_limit_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.subreddit_post_limit_entry.grid(row=1, column=1, padx=20, pady=5, sticky="w")
 
         # Post Scores
-        ctk.CTkLabel(filters_frame, text="Min score", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=5, sticky="w")
-        self.subreddit_post_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                            fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                            corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Min score", text_color=text_color).grid(row=2, column=0, padx=20, pady=5, sticky="w")
+        self.subreddit_post_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.subreddit_post_score_lower_entry.grid(row=2, column=1, padx=20, pady=5, sticky="w")
         
-        ctk.CTkLabel(filters_frame, text="Max score", text_color=self.THEME_TEXT).grid(row=2, column=2, padx=20, pady=5, sticky="w")
-        self.subreddit_post_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                            fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                            corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max score", text_color=text_color).grid(row=2, column=2, padx=20, pady=5, sticky="w")
+        self.subreddit_post_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.subreddit_post_score_upper_entry.grid(row=2, column=3, padx=20, pady=5, sticky="w")
 
         # Post Text
-        ctk.CTkLabel(filters_frame, text="Contains text", text_color=self.THEME_TEXT).grid(row=3, column=0, padx=20, pady=5, sticky="w")
-        self.subreddit_post_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by title/body", 
-                                                            fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                            corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Contains text", text_color=text_color).grid(row=3, column=0, padx=20, pady=5, sticky="w")
+        self.subreddit_post_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by title/body", **self._ENTRY_KW)
         self.subreddit_post_text_filter_entry.grid(row=3, column=1, columnspan=3, padx=20, pady=5, sticky="ew")
 
         # Separator
@@ -415,174 +503,158 @@ class downloaderApp:
 
         # Comment Filters Header
         ctk.CTkLabel(filters_frame, text="Comment Filters", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=5, column=0, columnspan=4, padx=20, pady=5, sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=5, column=0, columnspan=4, padx=20, pady=5, sticky="w")
 
         # Comment Scores
-        ctk.CTkLabel(filters_frame, text="Min score", text_color=self.THEME_TEXT).grid(row=6, column=0, padx=20, pady=5, sticky="w")
-        self.subreddit_comment_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                               fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                               corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Min score", text_color=text_color).grid(row=6, column=0, padx=20, pady=5, sticky="w")
+        self.subreddit_comment_score_lower_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.subreddit_comment_score_lower_entry.grid(row=6, column=1, padx=20, pady=5, sticky="w")
         
-        ctk.CTkLabel(filters_frame, text="Max score", text_color=self.THEME_TEXT).grid(row=6, column=2, padx=20, pady=5, sticky="w")
-        self.subreddit_comment_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, 
-                                                               fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                               corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Max score", text_color=text_color).grid(row=6, column=2, padx=20, pady=5, sticky="w")
+        self.subreddit_comment_score_upper_entry = ctk.CTkEntry(filters_frame, width=120, **self._ENTRY_KW)
         self.subreddit_comment_score_upper_entry.grid(row=6, column=3, padx=20, pady=5, sticky="w")
 
         # Comment Text
-        ctk.CTkLabel(filters_frame, text="Contains text", text_color=self.THEME_TEXT).grid(row=7, column=0, padx=20, pady=(5, 20), sticky="w")
-        self.subreddit_comment_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by comment body", 
-                                                               fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                               corner_radius=10, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(filters_frame, text="Contains text", text_color=text_color).grid(row=7, column=0, padx=20, pady=(5, 20), sticky="w")
+        self.subreddit_comment_text_filter_entry = ctk.CTkEntry(filters_frame, placeholder_text="Filter by comment body", **self._ENTRY_KW)
         self.subreddit_comment_text_filter_entry.grid(row=7, column=1, columnspan=3, padx=20, pady=(5, 20), sticky="ew")
 
         # --- Start Button ---
-        self.start_subreddit_button = ctk.CTkButton(self.subreddit_tab, text="Start Subreddit History Download", 
-                                                   command=self.start_subreddit_download, 
-                                                   height=45, corner_radius=22,
-                                                   fg_color=self.THEME_ACCENT, hover_color=self.THEME_ACCENT_HOVER,
-                                                   font=ctk.CTkFont(family="Helvetica Neue", weight="bold"))
+        self.start_subreddit_button = ctk.CTkButton(self.subreddit_tab, text="Start Subreddit History Download",
+                                                   command=self.start_subreddit_download, **self._PRIMARY_BUTTON_KW,
+                                                   font=self.F_LABEL_BOLD, state=self._download_state)
         self.start_subreddit_button.grid(row=2, column=0, padx=20, pady=(20, 0), sticky="ew")
 
+        # Attach the cards last so the tab is laid out once
+        sub_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
+        filters_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=0)
+
     def create_enhanced_search_widgets(self):
         """Creates the Enhanced User Search tab for AI-powered analysis."""
+        text_color, secondary_color = self.THEME_TEXT, self.THEME_TEXT_SECONDARY
         self.enhanced_search_tab.grid_columnconfigure(0, weight=1)
         
         # --- Header Card ---
-        header_frame = ctk.CTkFrame(self.enhanced_search_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                   border_width=2, border_color=self.THEME_BORDER)
-        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        header_frame = ctk.CTkFrame(self.enhanced_search_tab, **self._CARD_FRAME_KW)
         header_frame.grid_columnconfigure(0, weight=1)
         
         ctk.CTkLabel(header_frame, text="AI-Powered Analysis", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=20, weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+                    font=self.F_TITLE,
+                    text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
         ctk.CTkLabel(header_frame, 
                     text="Analyze a Reddit user's history with Google Gemini AI", 
-                    font=ctk.CTkFont(family="Helvetica Neue", size=13),
-                    text_color=self.THEME_TEXT_SECONDARY).grid(row=1, column=0, padx=20, pady=(0, 20), sticky="w")
+                    font=self.F_SUBTITLE,
+                    text_color=secondary_color).grid(row=1, column=0, padx=20, pady=(0, 20), sticky="w")
         
         # --- Input Card ---
-        input_frame = ctk.CTkFrame(self.enhanced_search_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                  border_width=2, border_color=self.THEME_BORDER)
-        input_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
+        input_frame = ctk.CTkFrame(self.enhanced_search_tab, **self._CARD_FRAME_KW)
         input_frame.grid_columnconfigure(1, weight=1)
         
         # Username
-        ctk.CTkLabel(input_frame, text="Username", text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
-        self.ai_username_entry = ctk.CTkEntry(input_frame, placeholder_text="e.g. spez", 
-                                             fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                             corner_radius=10, height=40, text_color=self.THEME_TEXT)
+        ctk.CTkLabel(input_frame, text="Username", text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+        self.ai_username_entry = ctk.CTkEntry(input_frame, placeholder_text="e.g. spez", height=40, **self._ENTRY_KW)
         self.ai_username_entry.grid(row=0, column=1, padx=20, pady=(20, 5), sticky="ew")
         
         # Time Period
-        ctk.CTkLabel(input_frame, text="Time Period", text_color=self.THEME_TEXT).grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        ctk.CTkLabel(input_frame, text="Time Period", text_color=text_color).grid(row=1, column=0, padx=20, pady=5, sticky="w")
         self.time_period_selector = ctk.CTkComboBox(input_frame, 
-                                                    values=['Last 7 days', 'Last 30 days', 'Last 3 months', 
-                                                           'Last 6 months', 'Last 1 year', 'All time'],
+                                                    values=list(_TIME_PERIODS),
                                                     fg_color=self.THEME_ACCENT, border_width=0,
                                                     corner_radius=10, height=40,
                                                     button_color=self.THEME_ACCENT, button_hover_color=self.THEME_ACCENT_HOVER,
                                                     text_color="#FFFFFF", dropdown_fg_color=self.THEME_ELEVATED_BG,
-                                                    dropdown_text_color=self.THEME_TEXT, state="readonly")
+                                                    dropdown_text_color=text_color, state="readonly")
         self.time_period_selector.set('Last 3 months')
         self.time_period_selector.grid(row=1, column=1, padx=20, pady=5, sticky="ew")
         
         # Question
-        ctk.CTkLabel(input_frame, text="Your Question", text_color=self.THEME_TEXT).grid(row=2, column=0, padx=20, pady=(10, 5), sticky="nw")
-        self.ai_question_textbox = ctk.CTkTextbox(input_frame, height=100, 
-                                                  fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                  corner_radius=10, text_color=self.THEME_PLACEHOLDER_TEXT)
+        ctk.CTkLabel(input_frame, text="Your Question", text_color=text_color).grid(row=2, column=0, padx=20, pady=(10, 5), sticky="nw")
+        self.ai_question_textbox = ctk.CTkTextbox(input_frame, height=100, **self._TEXTBOX_KW,
+                                                  text_color=text_color)
         self.ai_question_textbox.grid(row=2, column=1, padx=20, pady=(10, 5), sticky="ew")
         
-        # Placeholder Logic
+        # Placeholder Logic: a label drawn over the empty textbox, so the text buffer is never
+        # rewritten on focus changes. An empty question falls back to the placeholder.
         self.ai_question_placeholder = "What are this user's main interests and topics they engage with?"
-        self.ai_question_textbox.insert("1.0", self.ai_question_placeholder)
+        self._placeholder_label = ctk.CTkLabel(input_frame, text=self.ai_question_placeholder,
+                                               fg_color=self.THEME_INPUT_BG, text_color=self.THEME_PLACEHOLDER_TEXT)
+        self._placeholder_label.grid(row=2, column=1, padx=(28, 28), pady=(14, 5), sticky="nw")
         
-        def on_focus_in(event):
-            if self.ai_question_textbox.get("1.0", "end-1c") == self.ai_question_placeholder:
-                self.ai_question_textbox.delete("1.0", "end")
-                self.ai_question_textbox.configure(text_color=self.THEME_TEXT)
+        def on_key_press(event):
+            self._placeholder_label.grid_remove()
 
         def on_focus_out(event):
             if not self.ai_question_textbox.get("1.0", "end-1c").strip():
-                self.ai_question_textbox.insert("1.0", self.ai_question_placeholder)
-                self.ai_question_textbox.configure(text_color=self.THEME_PLACEHOLDER_TEXT)
+                self._placeholder_label.grid()
 
-        self.ai_question_textbox.bind("<FocusIn>", on_focus_in)
+        self.ai_question_textbox.bind("<KeyPress>", on_key_press)
         self.ai_question_textbox.bind("<FocusOut>", on_focus_out)
+        # Clicking the overlay should behave like clicking the textbox underneath
+        self._placeholder_label.bind("<Button-1>", lambda event: self.ai_question_textbox.focus_set())
         
         # Analyze Button
         self.analyze_button = ctk.CTkButton(input_frame, text="Analyze User with AI", 
-                                           command=self.start_ai_analysis, height=45, corner_radius=22,
-                                           fg_color=self.THEME_ACCENT, hover_color=self.THEME_ACCENT_HOVER,
-                                           font=ctk.CTkFont(family="Helvetica Neue", weight="bold"))
+                                           command=self.start_ai_analysis, **self._PRIMARY_BUTTON_KW,
+                                           font=self.F_LABEL_BOLD)
         self.analyze_button.grid(row=3, column=0, columnspan=2, padx=20, pady=20, sticky="ew")
         
         # --- Response Card ---
-        response_frame = ctk.CTkFrame(self.enhanced_search_tab, fg_color=self.THEME_CARD_BG, corner_radius=15,
-                                     border_width=2, border_color=self.THEME_BORDER)
-        response_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=(0, 20))
+        response_frame = ctk.CTkFrame(self.enhanced_search_tab, **self._CARD_FRAME_KW)
         response_frame.grid_columnconfigure(0, weight=1)
         response_frame.grid_rowconfigure(1, weight=1)
         self.enhanced_search_tab.grid_rowconfigure(2, weight=1)
         
         ctk.CTkLabel(response_frame, text="AI Response", 
-                    font=ctk.CTkFont(family="Helvetica Neue", weight="bold"),
-                    text_color=self.THEME_TEXT).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+                    font=self.F_LABEL_BOLD,
+                    text_color=text_color).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
         
-        self.ai_response_textbox = ctk.CTkTextbox(response_frame, wrap='word', 
-                                                  fg_color=self.THEME_INPUT_BG, border_width=1, border_color=self.THEME_BORDER,
-                                                  corner_radius=10, text_color=self.THEME_TEXT, font=("Helvetica Neue", 13))
+        self.ai_response_textbox = ctk.CTkTextbox(response_frame, wrap='word', **self._TEXTBOX_KW,
+                                                  text_color=text_color, font=("Helvetica Neue", 13))
         self.ai_response_textbox.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="nsew")
         self.ai_response_textbox.insert("1.0", "AI analysis will appear here...")
         self.ai_response_textbox.configure(state='disabled')
 
+        # Attach the cards last so the tab is laid out once
+        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        input_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 10))
+        response_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=(0, 20))
+
     def check_initial_credentials(self):
-        """Check if credentials exist and populate the form."""
-        if self.config:
-            self.client_id_entry.insert(0, self.config.get('client_id', ''))
-            self.client_secret_entry.insert(0, self.config.get('client_secret', ''))
-            user_agent = self.config.get('user_agent', 'RedditHistoryDownloader/2.0')
-            self.user_agent_entry.delete(0, 'end')
-            self.user_agent_entry.insert(0, user_agent)
-        
-        # Load Gemini API key if present
-        gemini_api_key = self.config.get('gemini_api_key', '')
-        if gemini_api_key:
-            self.gemini_api_key_entry.insert(0, gemini_api_key)
-        
-        # Validate in background
-            def validate_async():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                valid, message = loop.run_until_complete(
-                    validate_credentials(
-                        self.config.get('client_id', ''),
-                        self.config.get('client_secret', ''),
-                        user_agent
-                    )
-                )
-                loop.close()
+        """Check if credentials exist and validate them (the Settings form reads self.config when built)."""
+        client_id = self.config.get('client_id', '')
+        client_secret = self.config.get('client_secret', '')
+        user_agent = self.config.get('user_agent', 'RedditHistoryDownloader/2.0')
+        
+        # Nothing to validate until both Reddit credentials are saved (e.g. a Gemini-only config)
+        if not (client_id and client_secret):
+            self.log_message("[INFO] No credentials found. Please configure your API credentials in the Settings tab.")
+            self.disable_download_tabs()
+        elif recently_validated(self.config, client_id, client_secret, user_agent):
+            # Validated within the TTL with these exact credentials; skip the network round-trip
+            self.credentials_valid = True
+            self._set_status("🟢 Connected", self.THEME_SUCCESS)
+            self.log_message("[SUCCESS] Credentials loaded (validated recently).")
+        else:
+            # Validate in background
+            def on_validated(result):
+                valid, message = result
                 
                 if valid:
                     self.credentials_valid = True
-                    self.status_label.configure(text="🟢 Connected", text_color=self.THEME_SUCCESS)
+                    self._set_status("🟢 Connected", self.THEME_SUCCESS)
                     self.log_message("[SUCCESS] Credentials loaded and validated successfully!")
                 else:
                     self.credentials_valid = False
-                    self.status_label.configure(text="🔴 Invalid Credentials", text_color=self.THEME_ERROR)
+                    self._set_status("🔴 Invalid Credentials", self.THEME_ERROR)
                     self.log_message(f"[WARNING] Saved credentials are invalid: {message}")
                     self.log_message("[INFO] Please update your credentials in the Settings tab.")
                     self.disable_download_tabs()
-            
-            thread = threading.Thread(target=validate_async, daemon=True)
-            thread.start()
-        else:
-            self.log_message("[INFO] No credentials found. Please configure your API credentials in the Settings tab.")
-            self.disable_download_tabs()
+
+            self._submit_async(
+                validate_credentials(client_id, client_secret, user_agent, session=self._http_session),
+                on_validated
+            )
 
     def save_and_validate_credentials(self):
         """Saves and validates the API credentials."""
@@ -594,24 +666,14 @@ class downloaderApp:
         if not client_id or not client_secret:
             self.log_message("[ERROR] Please fill in both Client ID and Client Secret.")
             return
-        
-        self.log_message("[INFO] Validating credentials...")
-        self.save_button.configure(state='disabled', text="⏳ Validating...")
-        
-        def validate_async():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            valid, message = loop.run_until_complete(
-                validate_credentials(client_id, client_secret, user_agent)
-            )
-            loop.close()
-            
+
+        def on_validated(valid, message, validated=True):
             if valid:
                 # Save to config
-                if save_config(client_id, client_secret, user_agent, gemini_api_key):
+                if save_config(client_id, client_secret, user_agent, gemini_api_key, validated=validated):
                     self.config = load_config()
                     self.credentials_valid = True
-                    self.status_label.configure(text="🟢 Connected", text_color=self.THEME_SUCCESS)
+                    self._set_status("🟢 Connected", self.THEME_SUCCESS)
                     self.log_message(f"[SUCCESS] {message}")
                     self.log_message("[SUCCESS] Credentials saved successfully!")
                     self.enable_download_tabs()
@@ -619,59 +681,136 @@ class downloaderApp:
                     self.log_message("[ERROR] Failed to save credentials to config.json")
             else:
                 self.credentials_valid = False
-                self.status_label.configure(text="🔴 Invalid Credentials", text_color=self.THEME_ERROR)
+                self._set_status("🔴 Invalid Credentials", self.THEME_ERROR)
                 self.log_message(f"[ERROR] {message}")
                 self.disable_download_tabs()
             
             self.save_button.configure(state='normal', text="Save & Validate Credentials")
+
+        if recently_validated(self.config, client_id, client_secret, user_agent):
+            # Unchanged credentials that passed recently; just save (e.g. a new Gemini key)
+            on_validated(True, "Credentials unchanged and validated recently.", validated=False)
+            return
+        
+        self.log_message("[INFO] Validating credentials...")
+        self.save_button.configure(state='disabled', text="⏳ Validating...")
         
-        thread = threading.Thread(target=validate_async, daemon=True)
-        thread.start()
+        self._submit_async(
+            validate_credentials(client_id, client_secret, user_agent, session=self._http_session),
+            lambda result: on_validated(*result),
+            lambda error: on_validated(False, str(error))
+        )
+
+    def _submit_async(self, coro, on_success=None, on_error=None):
+        """Schedules coro on the shared loop and hands its result or exception to the Tk thread."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+        def on_done(future):
+            # Runs on the loop thread; callbacks must not touch widgets from here
+            try:
+                result = future.result()
+            except Exception as e:
+                self.root.after(0, on_error or self._log_async_error, e)
+            else:
+                if on_success is not None:
+                    self.root.after(0, on_success, result)
+
+        future.add_done_callback(on_done)
+        return future
+
+    def _log_async_error(self, error):
+        self.log_message(f"[ERROR] {error}")
+
+    def _on_download_error(self, error):
+        """A downloader raised instead of reporting OPERATION COMPLETE; unlock the buttons."""
+        self._log_async_error(error)
+        self.enable_download_buttons()
+
+    def _set_status(self, text, color):
+        """Records the credential status and shows it if the Settings tab has been built."""
+        self._status = (text, color)
+        if "Settings" in self._built:
+            self.status_label.configure(text=text, text_color=color)
+
+    def _set_download_state(self, state):
+        """Records the download button state and applies it to the buttons built so far."""
+        self._download_state = state
+        self.start_user_button.configure(state=state)
+        if "Subreddit History" in self._built:
+            self.start_subreddit_button.configure(state=state)
 
     def disable_download_tabs(self):
         """Disable User and Subreddit tabs when credentials are not configured."""
-        self.start_user_button.configure(state='disabled')
-        self.start_subreddit_button.configure(state='disabled')
+        self._set_download_state('disabled')
     
     def enable_download_tabs(self):
         """Enable User and Subreddit tabs when credentials are valid."""
-        self.start_user_button.configure(state='normal')
-        self.start_subreddit_button.configure(state='normal')
+        self._set_download_state('normal')
 
     def log_message(self, message):
         self.log_area.configure(state='normal')
-        self.log_area.insert(ctk.END, message + '\\n')
+        self.log_area.insert(ctk.END, message + '\n')
+        # Keep the text widget bounded so inserts stay cheap on long runs; a message may be
+        # a whole drained batch, so the line count is checked every LOG_TRIM_EVERY inserted lines
+        self._log_counter += message.count('\n') + 1
+        if self._log_counter >= self.LOG_TRIM_EVERY:
+            self._log_counter = 0
+            line_count = int(self.log_area.index('end-1c').split('.')[0])
+            if line_count > self.LOG_MAX_LINES:
+                self.log_area.delete('1.0', f'{line_count - self.LOG_MAX_LINES}.0')
         self.log_area.configure(state='disabled')
         self.log_area.see(ctk.END)
 
+    def _wake_log(self):
+        """Asks the Tk loop to drain the log pipe; called from whichever thread logged."""
+        try:
+            self.root.event_generate("<<LogPending>>", when="tail")
+        except Exception:
+            pass  # Window is gone; the fallback poll (or nothing) picks the messages up
+
     def process_queue(self):
+        """Drains the log pipe, then re-arms the fallback poll."""
+        self._drain_queue()
+        self.root.after(self.QUEUE_POLL_MS, self.process_queue)
+
+    def _drain_queue(self, event=None):
+        """Drains all pending log messages and writes them with a single textbox insert."""
+        # Re-arm the wake before draining so messages appended meanwhile trigger another one
+        self.msg_queue.wake_pending = False
+        messages = []
         try:
-            message = self.msg_queue.get_nowait()
-            self.log_message(message)
-            if "OPERATION COMPLETE" in message:
-                self.enable_download_buttons()
-        except queue.Empty:
+            while self.msg_queue:
+                messages.append(self.msg_queue.popleft())
+            if messages:
+                joined = '\n'.join(messages)
+                self.log_message(joined)
+                if "OPERATION COMPLETE" in joined:
+                    self.enable_download_buttons()
+        except IndexError:
             pass
-        finally:
-            self.root.after(100, self.process_queue)
     
     def _parse_int_value(self, value_str):
         """Converts a string to an integer, or None if invalid/empty."""
-        if not value_str:
-            return None
-        try:
-            return int(value_str)
-        except ValueError:
-            return None
+        # Checked up front so the common empty/invalid case never raises
+        value_str = value_str.strip()
+        digits = value_str[1:] if value_str.startswith(('-', '+')) else value_str
+        return int(value_str) if digits.isdecimal() else None
+
+    def _build_filter_spec(self, limit_entry, lower_entry, upper_entry, text_entry):
+        """Reads one group of filter entries into a FilterSpec; limit_entry may be None."""
+        return FilterSpec(
+            max_items=self._parse_int_value(limit_entry.get()) if limit_entry is not None else None,
+            score_lo=self._parse_int_value(lower_entry.get()),
+            score_hi=self._parse_int_value(upper_entry.get()),
+            text_re=FilterSpec.compile_text(text_entry.get().strip()),
+        )
 
     def disable_download_buttons(self):
-        self.start_user_button.configure(state='disabled')
-        self.start_subreddit_button.configure(state='disabled')
+        self._set_download_state('disabled')
 
     def enable_download_buttons(self):
         if self.credentials_valid:
-            self.start_user_button.configure(state='normal')
-            self.start_subreddit_button.configure(state='normal')
+            self._set_download_state('normal')
 
     def start_user_download(self):
         if not self.credentials_valid:
@@ -683,23 +822,18 @@ class downloaderApp:
             self.log_message("[ERROR] Please enter a username.")
             return
         
-        posts_limit = self._parse_int_value(self.user_posts_limit_entry.get())
-        comments_limit = self._parse_int_value(self.user_comments_limit_entry.get())
-        post_score_lower_threshold = self._parse_int_value(self.user_post_score_lower_entry.get())
-        post_score_upper_threshold = self._parse_int_value(self.user_post_score_upper_entry.get())
-        comment_score_lower_threshold = self._parse_int_value(self.user_comment_score_lower_entry.get())
-        comment_score_upper_threshold = self._parse_int_value(self.user_comment_score_upper_entry.get())
-        post_text_filter = self.user_post_text_filter_entry.get().strip()
-        comment_text_filter = self.user_comment_text_filter_entry.get().strip()
+        post_filter = self._build_filter_spec(self.user_posts_limit_entry, self.user_post_score_lower_entry,
+                                              self.user_post_score_upper_entry, self.user_post_text_filter_entry)
+        comment_filter = self._build_filter_spec(self.user_comments_limit_entry, self.user_comment_score_lower_entry,
+                                                 self.user_comment_score_upper_entry, self.user_comment_text_filter_entry)
 
         self.disable_download_buttons()
         self.log_message(f"--- STARTING USER DOWNLOADER FOR '{username}' ---")
         
-        def thread_target():
-            asyncio.run(run_user_downloader_async(username, posts_limit, comments_limit, post_score_lower_threshold, post_score_upper_threshold, comment_score_lower_threshold, comment_score_upper_threshold, post_text_filter, comment_text_filter, self.msg_queue, self.config))
-
-        thread = threading.Thread(target=thread_target, daemon=True)
-        thread.start()
+        self._submit_async(
+            run_user_downloader_async(username, post_filter, comment_filter, self.msg_queue, self.config, session=self._http_session),
+            on_error=self._on_download_error
+        )
 
     def start_subreddit_download(self):
         if not self.credentials_valid:
@@ -712,22 +846,36 @@ class downloaderApp:
             self.log_message("[ERROR] Please enter a subreddit name.")
             return
         
-        post_limit = self._parse_int_value(self.subreddit_post_limit_entry.get())
-        post_score_lower_threshold = self._parse_int_value(self.subreddit_post_score_lower_entry.get())
-        post_score_upper_threshold = self._parse_int_value(self.subreddit_post_score_upper_entry.get())
-        comment_score_lower_threshold = self._parse_int_value(self.subreddit_comment_score_lower_entry.get())
-        comment_score_upper_threshold = self._parse_int_value(self.subreddit_comment_score_upper_entry.get())
-        post_text_filter = self.subreddit_post_text_filter_entry.get().strip()
-        comment_text_filter = self.subreddit_comment_text_filter_entry.get().strip()
+        post_filter = self._build_filter_spec(self.subreddit_post_limit_entry, self.subreddit_post_score_lower_entry,
+                                              self.subreddit_post_score_upper_entry, self.subreddit_post_text_filter_entry)
+        comment_filter = self._build_filter_spec(None, self.subreddit_comment_score_lower_entry,
+                                                 self.subreddit_comment_score_upper_entry, self.subreddit_comment_text_filter_entry)
             
         self.disable_download_buttons()
         self.log_message(f"--- STARTING SUBREDDIT DOWNLOADER FOR 'r/{subreddit}' (method: {sort}) ---")
         
-        def thread_target():
-            asyncio.run(run_subreddit_downloader_async(subreddit, sort, post_limit, post_score_lower_threshold, post_score_upper_threshold, comment_score_lower_threshold, comment_score_upper_threshold, post_text_filter, comment_text_filter, self.msg_queue, self.config))
-
-        thread = threading.Thread(target=thread_target, daemon=True)
-        thread.start()
+        self._submit_async(
+            run_subreddit_downloader_async(subreddit, sort, post_filter, comment_filter, self.msg_queue, self.config, session=self._http_session),
+            on_error=self._on_download_error
+        )
+
+    def _set_textbox(self, textbox, text):
+        """Replaces the contents of a read-only textbox in one normal/disabled round."""
+        textbox.configure(state='normal')
+        textbox.delete("1.0", "end")
+        textbox.insert("1.0", text)
+        textbox.configure(state='disabled')
+
+    def _append_response(self, text):
+        """Appends a streamed piece of the AI answer, replacing the progress text on the first one."""
+        textbox = self.ai_response_textbox
+        textbox.configure(state='normal')
+        if not self._ai_response_streaming:
+            textbox.delete("1.0", "end")
+            self._ai_response_streaming = True
+        textbox.insert("end", text)
+        textbox.see("end")
+        textbox.configure(state='disabled')
 
     def start_ai_analysis(self):
         """Starts the AI analysis process for a Reddit user."""
@@ -746,59 +894,36 @@ class downloaderApp:
             self.log_message("[ERROR] Please enter a username.")
             return
         
-        question = self.ai_question_textbox.get("1.0", "end-1c").strip()
-        if not question:
-            self.log_message("[ERROR] Please enter a question.")
-            return
+        question = self.ai_question_textbox.get("1.0", "end-1c").strip() or self.ai_question_placeholder
         
         # Parse time period
         time_period_str = self.time_period_selector.get()
-        time_period_map = {
-            'Last 7 days': 7,
-            'Last 30 days': 30,
-            'Last 3 months': 90,
-            'Last 6 months': 180,
-            'Last 1 year': 365,
-            'All time': 36500
-        }
-        days = time_period_map.get(time_period_str, 90)
+        days = _TIME_PERIOD_MAP.get(time_period_str, 90)
         
         self.log_message(f"--- STARTING AI ANALYSIS FOR '{username}' ({time_period_str}) ---")
         self.analyze_button.configure(state='disabled', text="⏳ Analyzing...")
-        self.ai_response_textbox.configure(state='normal')
-        self.ai_response_textbox.delete("1.0", "end")
-        self.ai_response_textbox.insert("1.0", "Gathering data and analyzing... This may take a minute...")
-        self.ai_response_textbox.configure(state='disabled')
-        
-        def thread_target():
-            try:
-                # Run the async analysis
-                result = asyncio.run(run_ai_analysis_async(
-                    username, 
-                    question, 
-                    days, 
-                    self.config, 
-                    self.msg_queue
-                ))
-                
-                # Update UI with result
-                def update_ui():
-                    self.ai_response_textbox.configure(state='normal')
-                    self.ai_response_textbox.delete("1.0", "end")
-                    self.ai_response_textbox.insert("1.0", result)
-                    self.ai_response_textbox.configure(state='disabled')
-                    self.analyze_button.configure(state='normal', text="Analyze User with AI")
-                
-                self.root.after(0, update_ui)
-                
-            except Exception as e:
-                self.msg_queue.put(f"[ERROR] Analysis failed: {str(e)}")
-                def reset_ui():
-                    self.analyze_button.configure(state='normal', text="Analyze User with AI")
-                self.root.after(0, reset_ui)
-
-        thread = threading.Thread(target=thread_target, daemon=True)
-        thread.start()
+        self._set_textbox(self.ai_response_textbox, "Gathering data and analyzing... This may take a minute...")
+        self._ai_response_streaming = False
+        
+        def update_ui(result):
+            success, response = result
+            # A streamed answer is already in place; only a cached answer or a failure replaces the box
+            if not success:
+                self._set_textbox(self.ai_response_textbox, "Analysis failed. See the log for details.")
+            elif not self._ai_response_streaming:
+                self._set_textbox(self.ai_response_textbox, response)
+            self.analyze_button.configure(state='normal', text="Analyze User with AI")
+
+        def on_error(error):
+            self.log_message(f"[ERROR] Analysis failed: {str(error)}")
+            update_ui((False, ""))
+
+        self._submit_async(
+            run_ai_analysis_async(username, days, question, self.config, self.msg_queue, session=self._http_session,
+                                  on_chunk=lambda text: self.root.after(0, self._append_response, text)),
+            update_ui,
+            on_error
+        )
 
 # --- APPLICATION START ---
 
@@ -0,0 +1,85 @@
+"""
+Rate Limiter Module
+
+Async token bucket used to keep Reddit and Gemini requests within their API quotas,
+plus the concurrency helpers shared by the Reddit downloader and the AI analyzer.
+"""
+
+import asyncio
+import time
+
+
+# Reddit's OAuth quota is 100 requests per minute; stay a little under it
+REDDIT_RPM = 95
+
+# One limiter per event loop, shared by every Reddit request running on it
+_reddit_limiters = {}
+
+
+class AsyncRateLimiter:
+    """Token bucket that limits how many requests may start within a time window."""
+
+    def __init__(self, rate, per=60.0):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.refill_per_second = rate / per
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and consumes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.refill_per_second)
+
+
+def get_reddit_limiter():
+    """Returns the Reddit request limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    limiter = _reddit_limiters.get(loop)
+    if limiter is None:
+        limiter = _reddit_limiters[loop] = AsyncRateLimiter(REDDIT_RPM)
+    return limiter
+
+
+async def rate_limited(listing, limiter, page_size=100):
+    """Yields from an async listing, taking a token before each page it will request.
+
+    The token for the next page is only taken once the caller asks for the item after a
+    full page, so a caller that stops at a page boundary doesn't spend one.
+    """
+    count = 0
+    await limiter.acquire()
+    async for item in listing:
+        yield item
+        count += 1
+        if count == page_size:
+            count = 0
+            await limiter.acquire()
+
+
+async def gather_fail_fast(*coros):
+    """Runs coroutines concurrently and returns their results in order.
+
+    Unlike asyncio.gather, the first failure cancels the others (e.g. a suspended user
+    stops the sibling listing from paging on) before it is re-raised.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    # Let cancelled tasks unwind before the error is reported
+    await asyncio.wait(tasks)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
@@ -5,271 +5,388 @@ Handles all Reddit API interactions for extracting user and subreddit data.
 Includes filtering by score, text content, and concurrent comment processing.
 """
 
-import asyncpraw as praw
 import json
 import asyncio
-from datetime import datetime, timezone
+import functools
+import gzip
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from asyncpraw.models import MoreComments
+
+from ai_analyzer import PROGRESS_INTERVAL
+from config_manager import get_reddit_client
+from rate_limiter import gather_fail_fast, get_reddit_limiter, rate_limited
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; write_ndjson falls back to json.dumps
+    orjson = None
+
+# Posts whose comment trees are fetched concurrently by the subreddit downloader
+COMMENT_WORKERS = 15
+
+# "Load more comments" stubs expanded per post; each expansion is one /api/morechildren request
+REPLACE_MORE_LIMIT = 10
+
+
+def format_utc(timestamp):
+    """Formats a Unix timestamp as 'YYYY-MM-DD HH:MM:SS' UTC without building a datetime."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))
+
+
+def write_ndjson(f, record):
+    """Appends one record as a single line to an NDJSON file opened in binary mode."""
+    if orjson is not None:
+        f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+    else:
+        f.write(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+        f.write(b'\n')
+
+
+@dataclass
+class FilterSpec:
+    """Parsed filter settings for one kind of item (posts or comments).
+
+    text_re is a precompiled case-insensitive pattern for the text filter, or None for no filter.
+    """
+    __slots__ = ('max_items', 'score_lo', 'score_hi', 'text_re')
+    max_items: Optional[int]
+    score_lo: Optional[int]
+    score_hi: Optional[int]
+    text_re: Optional[re.Pattern]
+
+    @staticmethod
+    def compile_text(text):
+        """Compiles a literal, case-insensitive "contains" filter; empty text means no filter."""
+        return re.compile(re.escape(text), re.IGNORECASE) if text else None
+
+    def score_check(self):
+        """Returns a predicate for the score range, specialized for whichever bounds are set."""
+        lo, hi = self.score_lo, self.score_hi
+        if lo is None and hi is None:
+            return lambda score: True
+        if hi is None:
+            return lambda score: score >= lo
+        if lo is None:
+            return lambda score: score <= hi
+        return lambda score: lo <= score <= hi
+
+    def score_description(self):
+        """Human-readable summary of the score thresholds for log messages."""
+        score_parts = []
+        if self.score_lo is not None:
+            score_parts.append(f"score >= {self.score_lo}")
+        if self.score_hi is not None:
+            score_parts.append(f"score <= {self.score_hi}")
+        return " and ".join(score_parts) if score_parts else "none"
+
+
+def _discard_output(filename):
+    """Removes a partially written output file so a failed download leaves nothing behind."""
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
 
+async def download_user_submissions(redditor, msg_queue, spec):
+    """Fetches a user's posts, filtered by score and text, and streams them to an NDJSON file.
 
-async def download_user_submissions(redditor, msg_queue, limit, score_lower_threshold, score_upper_threshold, post_text_filter):
-    """Fetches a user's posts, filtered by score and text, and saves them to a JSON file. Returns the count."""
+    Returns the count; errors are re-raised for the caller to report and to stop the other download.
+    """
     username = redditor.name
-    posts_for_json = []
+    limit = spec.max_items
     limit_str = "maximum possible" if limit is None else str(limit)
-    
-    score_parts = []
-    if score_lower_threshold is not None:
-        score_parts.append(f"score >= {score_lower_threshold}")
-    if score_upper_threshold is not None:
-        score_parts.append(f"score <= {score_upper_threshold}")
-    score_str = " and ".join(score_parts) if score_parts else "none"
-
-    msg_queue.put(f"[INFO] Starting POST extraction for u/{username} (limit: {limit_str}, score threshold: {score_str})...")
+    score_ok = spec.score_check()
+    score_str = spec.score_description()
+
+    msg_queue.append(f"[INFO] Starting POST extraction for u/{username} (limit: {limit_str}, score threshold: {score_str})...")
+    timestamp = datetime.now().strftime("_%Y%m%d")
+    json_filename = f"user_{username}_posts{timestamp}.ndjson"
+    post_count = 0
     try:
-        async for post in redditor.submissions.new(limit=limit):
-            score_ok = True
-            if score_lower_threshold is not None and post.score < score_lower_threshold:
-                score_ok = False
-            if score_upper_threshold is not None and post.score > score_upper_threshold:
-                score_ok = False
-            
-            if not score_ok:
-                continue
-
-            if post_text_filter and not (post_text_filter.lower() in post.title.lower() or post_text_filter.lower() in post.selftext.lower()):
-                continue
-
-            posts_for_json.append({
-                'subreddit': post.subreddit.display_name,
-                'title': post.title,
-                'selftext': post.selftext,
-                'score': post.score,
-                'url': post.url,
-                'created_utc': post.created_utc,
-                'created_utc_str': datetime.fromtimestamp(post.created_utc, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        post_count = len(posts_for_json)
-        timestamp = datetime.now().strftime("_%Y%m%d")
-        json_filename = f"user_{username}_posts{timestamp}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(posts_for_json, f, indent=4, ensure_ascii=False)
-        msg_queue.put(f"[SUCCESS] Post extraction complete. File saved: {json_filename}")
-        msg_queue.put(f"[SUMMARY] Total posts extracted (after filtering): {post_count}")
+        # Records are written as they pass the filters, one JSON object per line
+        with open(json_filename, 'wb') as f:
+            async for post in rate_limited(redditor.submissions.new(limit=limit), get_reddit_limiter()):
+                if not score_ok(post.score):
+                    continue
+
+                if spec.text_re is not None and not (spec.text_re.search(post.title) or spec.text_re.search(post.selftext)):
+                    continue
+
+                write_ndjson(f, {
+                    'subreddit': post.subreddit.display_name,
+                    'title': post.title,
+                    'selftext': post.selftext,
+                    'score': post.score,
+                    'url': post.url,
+                    'created_utc': post.created_utc,
+                    'created_utc_str': format_utc(post.created_utc)
+                })
+                post_count += 1
+        msg_queue.append(f"[SUCCESS] Post extraction complete. File saved: {json_filename}")
+        msg_queue.append(f"[SUMMARY] Total posts extracted (after filtering): {post_count}")
         return post_count
-    except Exception as e:
-        msg_queue.put(f"[ERROR] Could not extract posts: {e}")
-        return 0
+    except (Exception, asyncio.CancelledError):
+        # The caller reports the error once; here only the partial file is cleaned up
+        _discard_output(json_filename)
+        raise
+
 
+async def download_user_comments(redditor, msg_queue, spec):
+    """Fetches a user's comments, filtered by score and text, and streams them to an NDJSON file.
 
-async def download_user_comments(redditor, msg_queue, limit, score_lower_threshold, score_upper_threshold, comment_text_filter):
-    """Fetches a user's comments, filtered by score and text, and saves them to a JSON file. Returns the count."""
+    Returns the count; errors are re-raised for the caller to report and to stop the other download.
+    """
     username = redditor.name
-    comments_for_json = []
+    limit = spec.max_items
     limit_str = "maximum possible" if limit is None else str(limit)
-    
-    score_parts = []
-    if score_lower_threshold is not None:
-        score_parts.append(f"score >= {score_lower_threshold}")
-    if score_upper_threshold is not None:
-        score_parts.append(f"score <= {score_upper_threshold}")
-    score_str = " and ".join(score_parts) if score_parts else "none"
-
-    msg_queue.put(f"[INFO] Starting COMMENT extraction for u/{username} (limit: {limit_str}, score threshold: {score_str})...")
+    score_ok = spec.score_check()
+    score_str = spec.score_description()
+
+    msg_queue.append(f"[INFO] Starting COMMENT extraction for u/{username} (limit: {limit_str}, score threshold: {score_str})...")
+    timestamp = datetime.now().strftime("_%Y%m%d")
+    json_filename = f"user_{username}_comments{timestamp}.ndjson"
+    comment_count = 0
     try:
-        async for comment in redditor.comments.new(limit=limit):
-            score_ok = True
-            if score_lower_threshold is not None and comment.score < score_lower_threshold:
-                score_ok = False
-            if score_upper_threshold is not None and comment.score > score_upper_threshold:
-                score_ok = False
-
-            if not score_ok:
-                continue
-
-            if comment.author is None and comment.body == "[removed]":
-                continue
-
-            if comment_text_filter and comment_text_filter.lower() not in comment.body.lower():
-                continue
-
-            comments_for_json.append({
-                'subreddit': comment.subreddit.display_name,
-                'body': comment.body,
-                'score': comment.score,
-                'permalink': f"https://www.reddit.com{comment.permalink}",
-                'created_utc_str': datetime.fromtimestamp(comment.created_utc, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-            })
-
-        comment_count = len(comments_for_json)
-        timestamp = datetime.now().strftime("_%Y%m%d")
-        json_filename = f"user_{username}_comments{timestamp}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(comments_for_json, f, indent=4, ensure_ascii=False)
-        msg_queue.put(f"[SUCCESS] Comment extraction complete. File saved: {json_filename}")
-        msg_queue.put(f"[SUMMARY] Total comments extracted (after filtering): {comment_count}")
+        # Records are written as they pass the filters, one JSON object per line
+        with open(json_filename, 'wb') as f:
+            async for comment in rate_limited(redditor.comments.new(limit=limit), get_reddit_limiter()):
+                if not score_ok(comment.score):
+                    continue
+
+                if comment.author is None and comment.body == "[removed]":
+                    continue
+
+                if spec.text_re is not None and not spec.text_re.search(comment.body):
+                    continue
+
+                write_ndjson(f, {
+                    'subreddit': comment.subreddit.display_name,
+                    'body': comment.body,
+                    'score': comment.score,
+                    'permalink': f"https://www.reddit.com{comment.permalink}",
+                    'created_utc_str': format_utc(comment.created_utc)
+                })
+                comment_count += 1
+        msg_queue.append(f"[SUCCESS] Comment extraction complete. File saved: {json_filename}")
+        msg_queue.append(f"[SUMMARY] Total comments extracted (after filtering): {comment_count}")
         return comment_count
-    except Exception as e:
-        msg_queue.put(f"[ERROR] Could not extract comments: {e}")
-        return 0
+    except (Exception, asyncio.CancelledError):
+        # The caller reports the error once; here only the partial file is cleaned up
+        _discard_output(json_filename)
+        raise
 
 
-async def run_user_downloader_async(username, posts_limit, comments_limit, post_score_lower_threshold, post_score_upper_threshold, comment_score_lower_threshold, comment_score_upper_threshold, post_text_filter, comment_text_filter, msg_queue, config):
-    """Target function for the user downloader thread."""
-    reddit = praw.Reddit(
-        client_id=config.get('client_id', ''),
-        client_secret=config.get('client_secret', ''),
-        user_agent=config.get('user_agent', 'RedditHistoryDownloader/2.0')
-    )
+async def run_user_downloader_async(username, post_filter, comment_filter, msg_queue, config, session=None):
+    """Target function for the user downloader.
+
+    The Reddit client is the cached one from get_reddit_client and stays open for later runs;
+    the app closes it at shutdown. If an aiohttp session is given, a newly built client uses it.
+    """
+    reddit = get_reddit_client(config, session)
     try:
         target_redditor = await reddit.redditor(username)
 
-        results = await asyncio.gather(
-            download_user_submissions(target_redditor, msg_queue, posts_limit, post_score_lower_threshold, post_score_upper_threshold, post_text_filter),
-            download_user_comments(target_redditor, msg_queue, comments_limit, comment_score_lower_threshold, comment_score_upper_threshold, comment_text_filter)
+        # If one side fails (e.g. rate limited or suspended user), the other is stopped
+        post_count, comment_count = await gather_fail_fast(
+            download_user_submissions(target_redditor, msg_queue, post_filter),
+            download_user_comments(target_redditor, msg_queue, comment_filter)
         )
-        post_count, comment_count = results
         
         if post_count == 0 and comment_count == 0:
-            msg_queue.put(f"\n[WARNING] User '{username}' has no visible content. The user either has no posts/comments or has set their history to hidden.")
+            msg_queue.append(f"\n[WARNING] User '{username}' has no visible content. The user either has no posts/comments or has set their history to hidden.")
     except Exception as e:
         err_text = str(e)
         if "404" in err_text:
-            msg_queue.put(f"[ERROR] User '{username}' does not exist or has been deleted.")
+            msg_queue.append(f"[ERROR] User '{username}' does not exist or has been deleted.")
         elif "Redditor' object has no attribute 'id" in err_text or "403" in err_text:
-            msg_queue.put(f"[ERROR] User '{username}' has been suspended from Reddit.")
+            msg_queue.append(f"[ERROR] User '{username}' has been suspended from Reddit.")
         else:
-            msg_queue.put(f"[ERROR] Could not find user '{username}'. Details: {e}")
-    finally:
-        if reddit: await reddit.close()
-    msg_queue.put("--- OPERATION COMPLETE ---")
-
-
-async def run_subreddit_downloader_async(subreddit_name, sort_method, post_limit, post_score_lower_threshold, post_score_upper_threshold, comment_score_lower_threshold, comment_score_upper_threshold, post_text_filter, comment_text_filter, msg_queue, config):
-    """Target function for the subreddit downloader thread, optimized with asyncio and pagination."""
-    reddit = praw.Reddit(
-        client_id=config.get('client_id', ''),
-        client_secret=config.get('client_secret', ''),
-        user_agent=config.get('user_agent', 'RedditHistoryDownloader/2.0')
-    )
+            msg_queue.append(f"[ERROR] Could not find user '{username}'. Details: {e}")
+    msg_queue.append("--- OPERATION COMPLETE ---")
+
+
+async def run_subreddit_downloader_async(subreddit_name, sort_method, post_filter, comment_filter, msg_queue, config, session=None):
+    """Target function for the subreddit downloader, optimized with asyncio and pagination.
+
+    The Reddit client is the cached one from get_reddit_client and stays open for later runs;
+    the app closes it at shutdown. If an aiohttp session is given, a newly built client uses it.
+    """
+    reddit = get_reddit_client(config, session)
     try:
         subreddit = await reddit.subreddit(subreddit_name)
         
         methods_to_download = [sort_method] if sort_method != 'all' else ['top', 'hot', 'new']
         
+        post_limit = post_filter.max_items
+        post_score_ok, comment_score_ok = post_filter.score_check(), comment_filter.score_check()
+        # fast_comments in config.json skips "load more" expansion and keeps only the comments already loaded
+        replace_more_limit = 0 if config.get('fast_comments') else REPLACE_MORE_LIMIT
+        post_text_re, comment_text_re = post_filter.text_re, comment_filter.text_re
+        limiter = get_reddit_limiter()
+
         limit_str = "all possible" if post_limit is None else str(post_limit)
-        post_score_parts = [s for s in [f"score >= {post_score_lower_threshold}" if post_score_lower_threshold is not None else None, f"score <= {post_score_upper_threshold}" if post_score_upper_threshold is not None else None] if s]
-        comment_score_parts = [s for s in [f"score >= {comment_score_lower_threshold}" if comment_score_lower_threshold is not None else None, f"score <= {comment_score_upper_threshold}" if comment_score_upper_threshold is not None else None] if s]
-        post_score_str = " and ".join(post_score_parts) or "none"
-        comment_score_str = " and ".join(comment_score_parts) or "none"
+        post_score_str = post_filter.score_description()
+        comment_score_str = comment_filter.score_description()
 
-        msg_queue.put(f"[INFO] Starting extraction for r/{subreddit_name} (methods: {', '.join(methods_to_download)}, post limit: {limit_str})...")
-        msg_queue.put(f"[INFO] Post score threshold: {post_score_str}, Comment score threshold: {comment_score_str}")
+        msg_queue.append(f"[INFO] Starting extraction for r/{subreddit_name} (methods: {', '.join(methods_to_download)}, post limit: {limit_str})...")
+        msg_queue.append(f"[INFO] Post score threshold: {post_score_str}, Comment score threshold: {comment_score_str}")
 
         posts_to_process = []
+        # Reddit ids are base36; storing them as ints keeps the set small and cheap to hash
         processed_post_ids = set()
+        last_log = time.monotonic()
 
-        for method in methods_to_download:
-            if post_limit is not None and len(posts_to_process) >= post_limit:
-                break
-
-            msg_queue.put(f"\n--- Fetching posts from '{method}'. This may take a while... ---")
+        async def collect(method):
+            nonlocal last_log
+            msg_queue.append(f"\n--- Fetching posts from '{method}'. This may take a while... ---")
             
-            submissions_iterator = getattr(subreddit, method)(limit=None)
+            submissions_iterator = rate_limited(getattr(subreddit, method)(limit=None), limiter)
 
             async for post in submissions_iterator:
-                if post.id in processed_post_ids:
+                # No await between this check and the add below, so concurrent listings can't both claim a post
+                post_id = int(post.id, 36)
+                if post_id in processed_post_ids:
                     continue
 
-                score_ok = True
-                if post_score_lower_threshold is not None and post.score < post_score_lower_threshold:
-                    score_ok = False
-                if post_score_upper_threshold is not None and post.score > post_score_upper_threshold:
-                    score_ok = False
-                
-                if not score_ok:
+                if not post_score_ok(post.score):
                     continue
 
-                if post_text_filter and not (post_text_filter.lower() in post.title.lower() or post_text_filter.lower() in post.selftext.lower()):
+                if post_text_re is not None and not (post_text_re.search(post.title) or post_text_re.search(post.selftext)):
                     continue
 
                 posts_to_process.append(post)
-                processed_post_ids.add(post.id)
+                processed_post_ids.add(post_id)
+                reached_limit = post_limit is not None and len(posts_to_process) >= post_limit
                 if post_limit:
-                    msg_queue.put(f"  -> Found matching post {len(posts_to_process)}/{post_limit} (Score: {post.score})")
+                    now = time.monotonic()
+                    if reached_limit or now - last_log > PROGRESS_INTERVAL:
+                        msg_queue.append(f"  -> Found matching post {len(posts_to_process)}/{post_limit} (Score: {post.score})")
+                        last_log = now
                 
-                if post_limit is not None and len(posts_to_process) >= post_limit:
+                if reached_limit:
+                    # Close the listing now rather than leaving it to the garbage collector
+                    await submissions_iterator.aclose()
                     break
+
+        if post_limit is None:
+            # Every listing is read to the end anyway, so read them side by side
+            await asyncio.gather(*(collect(method) for method in methods_to_download))
+        else:
+            # With a limit, earlier methods take priority and later ones are often never needed
+            for method in methods_to_download:
+                if len(posts_to_process) >= post_limit:
+                    break
+                await collect(method)
         
         total_posts_to_process = len(posts_to_process)
-        msg_queue.put(f"\n[INFO] Found {total_posts_to_process} unique posts. Now fetching comments concurrently...")
-
-        semaphore = asyncio.Semaphore(15)
-
-        async def process_post_concurrently(post, index, reddit_instance, comment_text_filter):
-            async with semaphore:
-                msg_queue.put(f"  -> ({index + 1}/{total_posts_to_process}) Processing post (Score: {post.score}): '{post.title[:40]}...' ")
+        msg_queue.append(f"\n[INFO] Found {total_posts_to_process} unique posts. Now fetching comments concurrently...")
+
+        async def process_post(post, index, comment_text_re):
+            nonlocal last_log
+            now = time.monotonic()
+            if now - last_log > PROGRESS_INTERVAL or index + 1 == total_posts_to_process:
+                msg_queue.append(f"  -> ({index + 1}/{total_posts_to_process}) Processing post (Score: {post.score}): '{post.title[:40]}...' ")
+                last_log = now
+            
+            comments_list = []
+            try:
+                # The listing already built this Submission; load() fills in its comment
+                # forest in place rather than constructing and fetching a second object
+                await limiter.acquire()
+                await post.load()
+                # Each "load more" stub expanded is its own request; count the top-level stubs
+                # rather than walking the whole forest
+                if replace_more_limit:
+                    stub_count = sum(isinstance(item, MoreComments) for item in post.comments)
+                    for _ in range(min(replace_more_limit, stub_count)):
+                        await limiter.acquire()
+                await post.comments.replace_more(limit=replace_more_limit)
                 
-                comments_list = []
-                try:
-                    submission = await reddit_instance.submission(id=post.id)
-                    await submission.comments.replace_more(limit=10)
-                    
-                    for comment in submission.comments.list():
-                        comment_score_ok = True
-                        if comment_score_lower_threshold is not None and comment.score < comment_score_lower_threshold:
-                            comment_score_ok = False
-                        if comment_score_upper_threshold is not None and comment.score > comment_score_upper_threshold:
-                            comment_score_ok = False
-
-                        if not comment_score_ok:
-                            continue
-
-                        if comment.author is None and comment.body == "[removed]":
-                            continue
-
-                        if comment_text_filter and comment_text_filter.lower() not in comment.body.lower():
-                            continue
-
-                        comments_list.append({
-                            'author': str(comment.author),
-                            'body': comment.body,
-                            'score': comment.score
-                        })
-                except Exception as e:
-                    err_type = type(e).__name__
-                    msg_queue.put(f"[WARNING] Could not fetch comments for post '{post.id}'. Error: {e} (Type: {err_type})")
-
-                return {
-                    'post_title': post.title,
-                    'post_author': str(post.author),
-                    'post_score': post.score,
-                    'post_url': post.url,
-                    'fetched_from': 'unknown',
-                    'comments_count': len(comments_list),
-                    'comments': comments_list
-                }
-
-        tasks = [process_post_concurrently(post, i, reddit, comment_text_filter) for i, post in enumerate(posts_to_process)]
-        all_data = await asyncio.gather(*tasks)
+                # Cheapest checks first; each attribute is read once per comment
+                for comment in post.comments.list():
+                    score = comment.score
+                    if not comment_score_ok(score):
+                        continue
+
+                    body = comment.body
+                    author = comment.author
+                    if author is None and body == "[removed]":
+                        continue
+
+                    if comment_text_re is not None and not comment_text_re.search(body):
+                        continue
+
+                    comments_list.append({
+                        'author': str(author),
+                        'body': body,
+                        'score': score
+                    })
+            except Exception as e:
+                err_type = type(e).__name__
+                msg_queue.append(f"[WARNING] Could not fetch comments for post '{post.id}'. Error: {e} (Type: {err_type})")
+
+            return {
+                'post_title': post.title,
+                'post_author': str(post.author),
+                'post_score': post.score,
+                'post_url': post.url,
+                'fetched_from': 'unknown',
+                'comments_count': len(comments_list),
+                'comments': comments_list
+            }
 
         timestamp = datetime.now().strftime("_%Y%m%d")
-        json_filename = f"subreddit_{subreddit_name}_{sort_method}_posts{timestamp}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, indent=4, ensure_ascii=False)
-        msg_queue.put(f"\n[SUCCESS] Subreddit extraction complete. File saved: {json_filename}")
-        msg_queue.put(f"TOTAL UNIQUE POSTS EXTRACTED (after filtering): {len(all_data)}")
+        json_filename = f"subreddit_{subreddit_name}_{sort_method}_posts{timestamp}.ndjson"
+        # compress_output in config.json gzips the file; level 1 keeps the CPU cost low
+        open_output = open
+        if config.get('compress_output'):
+            json_filename += ".gz"
+            open_output = functools.partial(gzip.open, compresslevel=1)
+        written = 0
+
+        # A fixed pool of workers drains the queue, so only COMMENT_WORKERS coroutines exist at
+        # once; each post is written as soon as its comments are in, in completion order
+        queue = asyncio.Queue()
+        for item in enumerate(posts_to_process):
+            queue.put_nowait(item)
+        # Loaded posts carry their comment forests; let each one go once its worker is done with it
+        posts_to_process.clear()
+
+        async def worker(f):
+            nonlocal written
+            while True:
+                try:
+                    index, post = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                write_ndjson(f, await process_post(post, index, comment_text_re))
+                written += 1
+
+        try:
+            with open_output(json_filename, 'wb') as f:
+                # A failed worker stops the others before the file is closed under them
+                await gather_fail_fast(*(worker(f) for _ in range(min(COMMENT_WORKERS, total_posts_to_process))))
+        except (Exception, asyncio.CancelledError):
+            _discard_output(json_filename)
+            raise
+        msg_queue.append(f"\n[SUCCESS] Subreddit extraction complete. File saved: {json_filename}")
+        msg_queue.append(f"TOTAL UNIQUE POSTS EXTRACTED (after filtering): {written}")
 
     except Exception as e:
         err_text = str(e)
         if "403" in err_text:
-            msg_queue.put(f"\n[ERROR] Could not access subreddit '{subreddit_name}'. It may be private or restricted.")
+            msg_queue.append(f"\n[ERROR] Could not access subreddit '{subreddit_name}'. It may be private or restricted.")
         elif "404" in err_text:
-            msg_queue.put(f"\n[ERROR] Subreddit '{subreddit_name}' may have been banned.")
+            msg_queue.append(f"\n[ERROR] Subreddit '{subreddit_name}' may have been banned.")
         elif "/subreddits/search" in err_text:
-            msg_queue.put(f"\n[ERROR] Subreddit '{subreddit_name}' could not be found.")
+            msg_queue.append(f"\n[ERROR] Subreddit '{subreddit_name}' could not be found.")
         else:
-            msg_queue.put(f"\n[ERROR] Could not process subreddit '{subreddit_name}'. Details: {e}")
-    finally:
-        if reddit: await reddit.close()
-    msg_queue.put("\n--- OPERATION COMPLETE ---\\n")
+            msg_queue.append(f"\n[ERROR] Could not process subreddit '{subreddit_name}'. Details: {e}")
+    msg_queue.append("\n--- OPERATION COMPLETE ---\\n")